@@ -0,0 +1,5 @@
+#!/usr/bin/env python3
+"""ASGI приложение: ``uvicorn asgi:app``"""
+from authservice.entrypoints.asgi import create_asgi_app
+
+app = create_asgi_app()
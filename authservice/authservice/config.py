@@ -1,13 +1,19 @@
 import json
 import os
+from typing import Literal
 
 from flask import cli
 from loguru import logger
-from pydantic import PostgresDsn, Field, BaseSettings
+from pydantic import PostgresDsn, Field, BaseSettings, root_validator
 from pydantic.json import pydantic_encoder
 
 cli.load_dotenv()
 
+# партиции sessions хранятся столько дней (retention pg_partman задаёт
+# миграция sessions_partitioning, изменение - только новой миграцией),
+# сессия не должна жить дольше
+SESSIONS_RETENTION_DAYS = 30
+
 
 class Settings(BaseSettings):
     """Settings Application"""
@@ -31,12 +37,101 @@ class Settings(BaseSettings):
         # echo=True,
     )
 
+    # Пул соединений воркера: pool_size постоянных соединений и до
+    # max_overflow временных, ожидание свободного не дольше timeout
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 10
+    # Пересоздавать соединения старше N секунд (-1 - никогда)
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    # Открыть pool_size соединений при старте воркера gunicorn
+    DB_POOL_WARMUP: bool = True
+    # statement_timeout, мс (None - по настройкам БД)
+    DB_STATEMENT_TIMEOUT: int | None = None
+    # Реплики для чтения (JSON список DSN): списки и история входов
+    # читаются с реплики, после записи клиент DB_REPLICA_STICKY секунд
+    # читает с primary
+    DB_REPLICA_URIS: list[PostgresDsn] = []
+    DB_REPLICA_STICKY: int = 5
+    SQLALCHEMY_BINDS: dict = {}
+
+    # Подключение через pgbouncer в режиме transaction: без параметров
+    # сессии, statement_timeout выставляется в каждой транзакции
+    DB_PGBOUNCER: bool = False
+
+    # Размер кэша скомпилированных запросов SQLAlchemy на движок.
+    # psycopg2 не поддерживает серверные prepared statements, поэтому
+    # повторная подготовка запроса экономится только на стороне Python
+    DB_QUERY_CACHE_SIZE: int = 500
+
+    # БД для asyncio режима (asgi.py), по умолчанию POSTGRES_URI
+    # с драйвером asyncpg
+    ASYNC_DB_URI: str | None = None
+
     JWT_SECRET: str
+    # HS256 - общий секрет, EdDSA - Ed25519 ключ, публикуется в JWKS
+    JWT_ALGORITHM: Literal["HS256", "EdDSA"] = "HS256"
+    JWT_PRIVATE_KEY_FILE: str | None = None
+    JWT_KEY_ID: str | None = None
+    JWKS_MAX_AGE: int = 3600
+    # Файл ключей для ротации без рестарта (см. jwt_utils.Keyring)
+    JWT_KEYS_FILE: str | None = None
+    JWT_KEYS_RELOAD_INTERVAL: int = 30
 
     DEFAULT_PASSWORD: str = os.environ.get("DEFAULT_PASSWORD")
 
     REFRESH_TOKEN_TTL: int = 20160  # two weeks
     ACCESS_TOKEN_TTL: int = 60
+    # Кэш проверенных access-токенов (0 - выключен)
+    ACCESS_TOKEN_CACHE_SIZE: int = 10000
+    # Период синхронизации списка отозванных сессий, сек
+    REVOCATION_SYNC_INTERVAL: int = 5
+
+    # Хэширование паролей: размер пула процессов (None - по числу ядер,
+    # 0 - в процессе воркера) и число задач, после которого отвечаем 503
+    PASSWORD_HASH_WORKERS: int | None = None
+    PASSWORD_HASH_QUEUE_SIZE: int = 32
+    PASSWORD_HASH_RETRY_AFTER: int = 1
+    # Алгоритм и стоимость хэша (итерации PBKDF2 или N для scrypt,
+    # None - по умолчанию), подобрать: poetry run calibrate_password_hash
+    PASSWORD_HASH_ALGORITHM: Literal[
+        "pbkdf2:sha256", "pbkdf2:sha512", "scrypt"
+    ] = "pbkdf2:sha256"
+    PASSWORD_HASH_COST: int | None = None
+
+    # Защита от перебора паролей: окно и пороги неудачных попыток,
+    # блокировка удваивается с каждой попыткой сверх порога
+    LOGIN_THROTTLE_STORAGE: Literal["memory", "redis"] = "memory"
+    LOGIN_THROTTLE_REDIS_URL: str | None = None
+    LOGIN_MAX_FAILURES_PER_LOGIN: int = 5
+    LOGIN_MAX_FAILURES_PER_IP: int = 50
+    LOGIN_FAILURE_WINDOW: int = 15 * 60
+    LOGIN_LOCKOUT: int = 1
+    LOGIN_MAX_LOCKOUT: int = 15 * 60
+
+    # Подсчёт total в списках: exact - count(*) на каждый запрос,
+    # cached - count(*) с кэшем на COUNT_CACHE_TTL секунд (сбрасывается
+    # при вставке и удалении строк), estimate - оценка планировщика для
+    # запросов без фильтров
+    LIST_COUNT_STRATEGY: Literal["exact", "cached", "estimate"] = "exact"
+    COUNT_CACHE_TTL: int = 30
+    COUNT_CACHE_SIZE: int = 1000
+
+    # Кэш записей пользователей (роль, логин, ФИО) в воркере, сбрасывается
+    # при изменении пользователя через API (0 - выключен)
+    USER_CACHE_SIZE: int = 10000
+    USER_CACHE_TTL: int = 60
+
+    # Буфер записи истории входов: строки вставляются пачкой из фонового
+    # потока по размеру или по времени, а не отдельной транзакцией
+    LOGIN_HISTORY_BUFFER: bool = False
+    LOGIN_HISTORY_BATCH_SIZE: int = 500
+    LOGIN_HISTORY_FLUSH_INTERVAL: float = 1.0
+    LOGIN_HISTORY_BUFFER_SIZE: int = 10000
+
+    # Число прокси перед сервисом, которым доверяем X-Forwarded-For
+    PROXY_FIX_X_FOR: int = 0
 
     # JAEGER tracer
     JAEGER_PORT: int
@@ -55,6 +150,53 @@ class Settings(BaseSettings):
     YANDEX_REDIRECT_URI: str
     YANDEX_CLIENT_SECRET: str
 
+    @root_validator(skip_on_failure=True)
+    def refresh_token_ttl(cls, values):
+        max_ttl = SESSIONS_RETENTION_DAYS * 24 * 60
+        if values["REFRESH_TOKEN_TTL"] > max_ttl:
+            # иначе партицию с живыми сессиями удалит pg_partman
+            raise ValueError(
+                f"REFRESH_TOKEN_TTL must not exceed {max_ttl} minutes "
+                f"({SESSIONS_RETENTION_DAYS} days of sessions retention)"
+            )
+        return values
+
+    @root_validator(skip_on_failure=True)
+    def engine_options(cls, values):
+        options = dict(
+            pool_size=values["DB_POOL_SIZE"],
+            max_overflow=values["DB_MAX_OVERFLOW"],
+            pool_timeout=values["DB_POOL_TIMEOUT"],
+            pool_recycle=values["DB_POOL_RECYCLE"],
+            pool_pre_ping=values["DB_POOL_PRE_PING"],
+            query_cache_size=values["DB_QUERY_CACHE_SIZE"],
+        )
+        timeout = values["DB_STATEMENT_TIMEOUT"]
+        if timeout and not values["DB_PGBOUNCER"]:
+            options["connect_args"] = dict(
+                options=f"-c statement_timeout={timeout}"
+            )
+
+        # явно заданные SQLALCHEMY_ENGINE_OPTIONS важнее
+        options.update(values["SQLALCHEMY_ENGINE_OPTIONS"])
+        values["SQLALCHEMY_ENGINE_OPTIONS"] = options
+        return values
+
+    @root_validator(skip_on_failure=True)
+    def async_db_uri(cls, values):
+        if not values["ASYNC_DB_URI"]:
+            _, rest = str(values["SQLALCHEMY_DATABASE_URI"]).split("://", 1)
+            values["ASYNC_DB_URI"] = f"postgresql+asyncpg://{rest}"
+        return values
+
+    @root_validator(skip_on_failure=True)
+    def replica_binds(cls, values):
+        binds = dict(values["SQLALCHEMY_BINDS"])
+        for i, uri in enumerate(values["DB_REPLICA_URIS"]):
+            binds.setdefault(f"replica_{i}", str(uri))
+        values["SQLALCHEMY_BINDS"] = binds
+        return values
+
 
 cfg = Settings()
 
@@ -1,7 +1,9 @@
 from flask_migrate import Migrate
 from flask_sqlalchemy import SQLAlchemy
 
-db = SQLAlchemy()
+from .routing import RoutingSession
+
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 migrate = Migrate(compare_type=True)
 
 __all__ = (
@@ -0,0 +1,67 @@
+import sqlalchemy.orm as so
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from ..config import cfg
+
+
+def engine_options() -> dict:
+    """Async engine options by DB_* settings"""
+
+    options = dict(
+        pool_size=cfg.DB_POOL_SIZE,
+        max_overflow=cfg.DB_MAX_OVERFLOW,
+        pool_timeout=cfg.DB_POOL_TIMEOUT,
+        pool_recycle=cfg.DB_POOL_RECYCLE,
+        pool_pre_ping=cfg.DB_POOL_PRE_PING,
+        query_cache_size=cfg.DB_QUERY_CACHE_SIZE,
+    )
+
+    connect_args = {}
+    if cfg.DB_PGBOUNCER:
+        # asyncpg готовит запросы на сервере, в режиме transaction
+        # pgbouncer подготовленный запрос может оказаться на другом
+        # соединении, поэтому кэш подготовленных запросов выключается
+        connect_args["statement_cache_size"] = 0
+        connect_args["prepared_statement_cache_size"] = 0
+    elif cfg.DB_STATEMENT_TIMEOUT:
+        connect_args["server_settings"] = dict(
+            statement_timeout=str(cfg.DB_STATEMENT_TIMEOUT)
+        )
+    if connect_args:
+        options["connect_args"] = connect_args
+    return options
+
+
+class AsyncDatabase:
+    """Async engine and session factory of asyncio mode
+
+    Движок создаётся при старте ASGI приложения (``init``), а не при
+    импорте: драйвер asyncpg нужен только в этом режиме.
+    """
+
+    def __init__(self):
+        self.engine: AsyncEngine | None = None
+        self._sessionmaker: so.sessionmaker | None = None
+
+    def init(self, uri: str = None, **options) -> None:
+        self.engine = create_async_engine(
+            uri or cfg.ASYNC_DB_URI, **(options or engine_options())
+        )
+        self._sessionmaker = so.sessionmaker(
+            self.engine, class_=AsyncSession, expire_on_commit=False
+        )
+
+    def session(self) -> AsyncSession:
+        if self._sessionmaker is None:
+            raise RuntimeError("Async database is not initialized")
+        return self._sessionmaker()
+
+    async def dispose(self) -> None:
+        if self.engine is not None:
+            await self.engine.dispose()
+            self.engine = None
+            self._sessionmaker = None
+
+
+async_db = AsyncDatabase()
@@ -0,0 +1,120 @@
+import datetime
+import uuid
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..entrypoints.extensions import Registry
+from . import models
+from .repositories import (
+    TokenRepository,
+    UserRecord,
+    UserRepository,
+    cache_user,
+    user_cache,
+)
+
+reg_async_repo = Registry()
+
+
+class AsyncBaseRepo:
+    """Base Async Repository
+
+    Повторяет методы ``repositories.py``, нужные asyncio режиму,
+    и выполняет те же запросы через ``AsyncSession``.
+    """
+
+    _model = None
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def get(self, _id: uuid.UUID):
+        return await self.session.get(self._model, _id)
+
+    def add(self, row):
+        self.session.add(row)
+
+
+@reg_async_repo.register("users")
+class AsyncUserRepository(AsyncBaseRepo):
+
+    _model = models.User
+
+    async def get_record(self, id_: uuid.UUID) -> UserRecord | None:
+        """User record from per-worker cache"""
+
+        record = user_cache.get(id_)
+        if record is not None:
+            return record
+
+        row = await self.get(id_)
+        if row is None:
+            return None
+        return cache_user(row)
+
+    async def get_by(self, *, login: str):
+        sql = await self.session.execute(
+            UserRepository._select_by_login, {"login": login}
+        )
+        row = sql.scalar()
+        return row
+
+
+@reg_async_repo.register("tokens")
+class AsyncTokenRepository(AsyncBaseRepo):
+
+    _model = models.Session
+
+    async def get_by(self, *, token: uuid.UUID):
+        sql = await self.session.execute(
+            TokenRepository._select_by_token,
+            {
+                "token_hash": models.hash_token(token),
+                "created_after": TokenRepository._live_created_after(),
+            },
+        )
+        row = sql.scalar()
+        return row
+
+    async def consume(self, *, token: uuid.UUID, now: datetime.datetime):
+        """Revoke active session and return its id and user_id"""
+
+        sql = await self.session.execute(
+            TokenRepository._consume_stmt(token, now)
+        )
+        row = sql.first()
+        return row
+
+    async def fetch_revoked(self, *, updated_after: datetime.datetime):
+        """Ids of sessions revoked after timestamp"""
+
+        sql = await self.session.execute(
+            TokenRepository._revoked_stmt(updated_after)
+        )
+        rows = sql.all()
+        return rows
+
+    async def fetch_by_tokens(self, tokens: list[uuid.UUID]):
+        """Sessions by refresh tokens in one query"""
+
+        if not tokens:
+            return []
+
+        sql = await self.session.execute(
+            TokenRepository._by_tokens_stmt(tokens)
+        )
+        rows = sql.scalars().all()
+        return rows
+
+
+@reg_async_repo.register("login_history")
+class AsyncHistoryRepository(AsyncBaseRepo):
+
+    _model = models.LoginHistory
+
+    def record(self, *, user_id: uuid.UUID, user_agent: str | None):
+        """Add login to the request transaction"""
+
+        # буфер истории входов пишет через сессию Flask-SQLAlchemy,
+        # в asyncio режиме строка вставляется вместе с сессией токена
+        self.add(models.LoginHistory(user_id=user_id, user_agent=user_agent))
@@ -0,0 +1,201 @@
+import atexit
+import datetime
+import os
+import threading
+import time
+import uuid
+from collections import deque
+
+import sqlalchemy as sa
+from flask import Flask
+from loguru import logger
+
+from ..config import cfg
+from ..utils.metrics import metrics
+from . import db, models
+
+# ошибки самих строк (пользователь удалён, дубль), повтор не поможет
+ROW_ERRORS = (sa.exc.IntegrityError, sa.exc.DataError)
+
+
+class LoginHistoryWriter:
+    """Write-behind buffer of login history
+
+    Записи копятся в памяти воркера и вставляются одним многострочным
+    INSERT в отдельной транзакции, когда набирается ``batch_size`` строк
+    или проходит ``flush_interval`` секунд. При переполнении буфера
+    (``max_size``) запрос сам сбрасывает его. Если пачку отвергла
+    БД из-за данных, строки пишутся по одной и отбрасываются только
+    плохие. Остаток записывается при остановке воркера.
+    """
+
+    def __init__(
+        self,
+        enabled: bool,
+        batch_size: int,
+        flush_interval: float,
+        max_size: int,
+    ):
+        self.enabled = enabled
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_size = max_size
+        self.flushed = 0
+        self.errors = 0
+        self.dropped = 0
+
+        self._app: Flask = None
+        self._rows: deque[tuple[float, dict]] = deque()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._pid: int | None = None
+        self._closed = False
+
+    def init_app(self, app: Flask) -> None:
+        self._app = app
+        atexit.register(self.close)
+
+        metrics.gauge(
+            "login_history_buffer_depth",
+            "Login history rows waiting for insert",
+            lambda: len(self._rows),
+        )
+        metrics.gauge(
+            "login_history_buffer_lag_seconds",
+            "Age of the oldest buffered login history row",
+            self.lag,
+        )
+        metrics.gauge(
+            "login_history_buffer_flushed",
+            "Login history rows inserted by the buffer",
+            lambda: self.flushed,
+            kind="counter",
+        )
+        metrics.gauge(
+            "login_history_buffer_dropped",
+            "Login history rows dropped by the buffer",
+            lambda: self.dropped,
+            kind="counter",
+        )
+
+    def lag(self) -> float:
+        try:
+            queued_at, _ = self._rows[0]
+        except IndexError:
+            return 0.0
+        return time.monotonic() - queued_at
+
+    def add(self, *, user_id: uuid.UUID, user_agent: str | None) -> None:
+        """Queue login row"""
+
+        self._ensure_thread()
+        self._rows.append(
+            (
+                time.monotonic(),
+                dict(
+                    id=uuid.uuid4(),
+                    user_id=user_id,
+                    user_agent=user_agent,
+                    logged_in_at=datetime.datetime.utcnow(),
+                ),
+            )
+        )
+
+        if len(self._rows) >= self.max_size:
+            # фоновый поток не успевает, пишем в потоке запроса
+            self.flush()
+        elif len(self._rows) >= self.batch_size:
+            self._wakeup.set()
+
+    def _ensure_thread(self) -> None:
+        # поток создаётся в каждом воркере gunicorn после fork
+        if self._pid == os.getpid():
+            return
+        with self._flush_lock:
+            if self._pid != os.getpid():
+                self._rows.clear()
+                threading.Thread(
+                    target=self._run, name="login-history-writer", daemon=True
+                ).start()
+                self._pid = os.getpid()
+
+    def _run(self) -> None:
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def flush(self) -> int:
+        """Insert buffered rows, return number of rows"""
+
+        with self._flush_lock:
+            batch = []
+            while self._rows and len(batch) < self.max_size:
+                batch.append(self._rows.popleft())
+            if not batch:
+                return 0
+
+            try:
+                self._insert([row for _, row in batch])
+            except ROW_ERRORS as e:
+                self.errors += 1
+                logger.error(f"Login history batch rejected: {e}")
+                return self._insert_each(batch)
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"Login history flush failed: {e}")
+                self._requeue(batch)
+                return 0
+
+            self.flushed += len(batch)
+            return len(batch)
+
+    def _insert(self, rows: list[dict]) -> None:
+        with self._app.app_context():
+            with db.engine.begin() as conn:
+                conn.execute(sa.insert(models.LoginHistory.__table__), rows)
+
+    def _insert_each(self, batch: list[tuple[float, dict]]) -> int:
+        """Insert rows one by one, drop rows rejected by database"""
+
+        inserted = 0
+        for i, (_, row) in enumerate(batch):
+            try:
+                self._insert([row])
+            except ROW_ERRORS as e:
+                self.dropped += 1
+                logger.error(f"Login history row dropped: {e}")
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"Login history flush failed: {e}")
+                self._requeue(batch[i:])
+                break
+            else:
+                inserted += 1
+
+        self.flushed += inserted
+        return inserted
+
+    def _requeue(self, batch: list[tuple[float, dict]]) -> None:
+        # вернём строки в начало очереди, но не больше max_size
+        self._rows.extendleft(reversed(batch))
+        while len(self._rows) > self.max_size:
+            self._rows.pop()
+            self.dropped += 1
+
+    def close(self) -> None:
+        """Flush rest on worker shutdown"""
+
+        self._closed = True
+        self._wakeup.set()
+        if self._pid == os.getpid():
+            while self._rows and self.flush():
+                pass
+
+
+history_writer = LoginHistoryWriter(
+    enabled=cfg.LOGIN_HISTORY_BUFFER,
+    batch_size=cfg.LOGIN_HISTORY_BATCH_SIZE,
+    flush_interval=cfg.LOGIN_HISTORY_FLUSH_INTERVAL,
+    max_size=cfg.LOGIN_HISTORY_BUFFER_SIZE,
+)
@@ -1,4 +1,5 @@
 import datetime
+import hashlib
 import uuid
 
 from authservice.database import db
@@ -45,6 +46,22 @@ class User(BaseModel):
 
     __tablename__ = "users"
 
+    __table_args__ = (
+        sa.Index("ix_users_created_at_id", "created_at", "id"),
+        sa.Index(
+            "ix_users_full_name_trgm",
+            "full_name",
+            postgresql_using="gin",
+            postgresql_ops={"full_name": "gin_trgm_ops"},
+        ),
+        sa.Index(
+            "ix_users_login_trgm",
+            "login",
+            postgresql_using="gin",
+            postgresql_ops={"login": "gin_trgm_ops"},
+        ),
+    )
+
     login = sa.Column(sa.String(255), comment="Логин", unique=True)
     full_name = sa.Column(sa.String(255), comment="ФИО")
     role = sa.Column(sa.String(255), comment="Роль")
@@ -52,11 +69,48 @@ class User(BaseModel):
     last_login = sa.Column(sa.DateTime, comment="Последний вход")
 
 
+def hash_token(token: uuid.UUID | str) -> bytes:
+    """SHA-256 of refresh token for indexed lookup"""
+
+    return hashlib.sha256(str(token).encode()).digest()
+
+
 class Session(BaseModel):
     """Model For Sessions"""
 
     __tablename__ = "sessions"
 
+    __table_args__ = (
+        sa.Index(
+            "ix_sessions_revoked_updated_at",
+            "updated_at",
+            postgresql_where=sa.text("expired_at IS NULL"),
+        ),
+        sa.Index(
+            "ix_sessions_user_id_created_at_id",
+            "user_id",
+            "created_at",
+            "id",
+        ),
+        {
+            "postgresql_partition_by": "RANGE (created_at)",
+        },
+    )
+
+    # ключ партиционирования обязан входить в первичный ключ таблицы,
+    # для ORM сессия по-прежнему идентифицируется только по id
+    created_at = sa.Column(
+        sa.DateTime(timezone=True),
+        primary_key=True,
+        nullable=False,
+        default=sa.func.current_timestamp(),
+        comment="Дата создания",
+    )
+
+    @orm.declared_attr
+    def __mapper_args__(cls):
+        return {"primary_key": [cls.__table__.c.id]}
+
     user_id = sa.Column(
         UUID(as_uuid=True),
         sa.ForeignKey("users.id", ondelete="CASCADE"),
@@ -65,10 +119,20 @@ class Session(BaseModel):
     )
 
     token = sa.Column(sa.String(1000), comment="Токен доступа")
+    token_hash = sa.Column(
+        sa.LargeBinary(32),
+        index=True,
+        comment="SHA-256 токена доступа",
+    )
     expired_at = sa.Column(sa.DateTime, comment="Длительность жизни токена")
 
     user = orm.relationship("User", backref=orm.backref("sessions"))
 
+    @orm.validates("token")
+    def validate_token(self, key, value):
+        self.token_hash = hash_token(value) if value is not None else None
+        return value
+
     @property
     def is_active(self):
         if not self.expired_at:
@@ -0,0 +1,167 @@
+import threading
+import time
+
+import sqlalchemy as sa
+from flask import Flask
+from loguru import logger
+from sqlalchemy.pool import QueuePool
+
+from ..config import cfg
+from ..utils.metrics import metrics
+from . import db
+
+
+class PoolStats:
+    """Connection pool counters of the worker"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.timeouts = 0
+        self.closed = 0
+        self.lifetime_seconds = 0.0
+
+    def observe_wait(self, seconds: float, timeout: bool = False) -> None:
+        with self._lock:
+            if timeout:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_seconds += seconds
+            self.max_wait_seconds = max(self.max_wait_seconds, seconds)
+
+    def observe_close(self, lifetime: float) -> None:
+        with self._lock:
+            self.closed += 1
+            self.lifetime_seconds += lifetime
+
+
+pool_stats = PoolStats()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool measuring checkout wait time"""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except sa.exc.TimeoutError:
+            pool_stats.observe_wait(time.perf_counter() - started, True)
+            raise
+        pool_stats.observe_wait(time.perf_counter() - started)
+        return conn
+
+
+@sa.event.listens_for(InstrumentedQueuePool, "connect")
+def _on_connect(dbapi_connection, connection_record):
+    connection_record.info["connected_at"] = time.monotonic()
+
+
+@sa.event.listens_for(InstrumentedQueuePool, "close")
+def _on_close(dbapi_connection, connection_record):
+    connected_at = connection_record.info.pop("connected_at", None)
+    if connected_at is not None:
+        pool_stats.observe_close(time.monotonic() - connected_at)
+
+
+def configure_pool(app: Flask) -> None:
+    """Engine options of pool, before db.init_app"""
+
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = dict(
+        poolclass=InstrumentedQueuePool,
+        **app.config["SQLALCHEMY_ENGINE_OPTIONS"],
+    )
+
+
+def init_pool(app: Flask) -> None:
+    """Pool events and metrics, after db.init_app"""
+
+    with app.app_context():
+        engine = db.engine
+
+    if cfg.DB_PGBOUNCER and cfg.DB_STATEMENT_TIMEOUT:
+        # параметры сессии pgbouncer не сохраняет между транзакциями
+        timeout = int(cfg.DB_STATEMENT_TIMEOUT)
+
+        @sa.event.listens_for(engine, "begin")
+        def _set_statement_timeout(conn):
+            conn.exec_driver_sql(f"SET LOCAL statement_timeout = {timeout}")
+
+    pool = engine.pool
+    if not isinstance(pool, QueuePool):
+        return
+
+    # pool_size=0 у QueuePool - пул без ограничения размера
+    capacity = pool.size() + max(pool._max_overflow, 0)
+    for name, description, fn, kind in (
+        ("db_pool_size", "Pool size", pool.size, "gauge"),
+        (
+            "db_pool_checked_out",
+            "Connections in use",
+            pool.checkedout,
+            "gauge",
+        ),
+        (
+            "db_pool_saturation",
+            "Connections in use to pool size with overflow",
+            lambda: pool.checkedout() / capacity if capacity else 0.0,
+            "gauge",
+        ),
+        (
+            "db_pool_checkouts_total",
+            "Checked out connections",
+            lambda: pool_stats.checkouts,
+            "counter",
+        ),
+        (
+            "db_pool_checkout_wait_seconds_total",
+            "Time spent waiting for a connection",
+            lambda: pool_stats.wait_seconds,
+            "counter",
+        ),
+        (
+            "db_pool_checkout_wait_seconds_max",
+            "Longest wait for a connection",
+            lambda: pool_stats.max_wait_seconds,
+            "gauge",
+        ),
+        (
+            "db_pool_timeouts_total",
+            "Checkouts failed by pool timeout",
+            lambda: pool_stats.timeouts,
+            "counter",
+        ),
+        (
+            "db_pool_connections_closed_total",
+            "Closed connections",
+            lambda: pool_stats.closed,
+            "counter",
+        ),
+        (
+            "db_pool_connection_lifetime_seconds_total",
+            "Lifetime of closed connections",
+            lambda: pool_stats.lifetime_seconds,
+            "counter",
+        ),
+    ):
+        metrics.gauge(name, description, fn, kind=kind)
+
+
+def warm_up(app: Flask) -> None:
+    """Open pool_size connections at worker start"""
+
+    with app.app_context():
+        pool = db.engine.pool
+        connections = []
+        try:
+            for _ in range(pool.size()):
+                connections.append(db.engine.raw_connection())
+        except sa.exc.SQLAlchemyError as e:
+            logger.warning(f"Pool warm-up failed: {e}")
+        finally:
+            for conn in connections:
+                conn.close()
+        logger.info(f"Pool warmed up: {len(connections)} connections")
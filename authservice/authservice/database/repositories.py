@@ -1,16 +1,83 @@
 import abc
+import collections
 import datetime
+import time
 import uuid
 
 from sqlalchemy import orm as so
 import sqlalchemy as sa
 from .. import schemas
+from ..config import cfg
+from ..entrypoints import enums
 from ..entrypoints.extensions import Registry
+from ..utils.cache import TTLCache
+from ..utils.metrics import metrics
+from ..utils.pagination import decode_cursor, encode_cursor
 from authservice.database import models
+from authservice.database.history_writer import history_writer
 from flask import g
 
 reg_repo = Registry()
 
+count_cache = TTLCache(cfg.COUNT_CACHE_SIZE)
+# поколение таблицы входит в ключ кэша, вставка, изменение или удаление
+# строк увеличивает его и делает старые значения недостижимыми
+count_generation: collections.Counter = collections.Counter()
+
+
+@sa.event.listens_for(so.Session, "after_flush")
+def _invalidate_counts(session, flush_context):
+    # изменение строки может вывести её из фильтра (роль, логин)
+    for table in {row.__tablename__ for row in (*session.new, *session.dirty)}:
+        count_generation[table] += 1
+    if session.deleted:
+        # удаление каскадно затрагивает зависимые таблицы
+        for table in models.BaseModel.metadata.tables:
+            count_generation[table] += 1
+
+
+# запись пользователя для выпуска токенов и карточки в админке
+UserRecord = collections.namedtuple(
+    "UserRecord", ["id", "role", "login", "full_name"]
+)
+
+user_cache = TTLCache(cfg.USER_CACHE_SIZE)
+USER_CACHE_STALE = "user_cache_stale"
+
+metrics.gauge(
+    "user_cache_hits",
+    "User record cache hits",
+    lambda: user_cache.hits,
+    kind="counter",
+)
+metrics.gauge(
+    "user_cache_misses",
+    "User record cache misses",
+    lambda: user_cache.misses,
+    kind="counter",
+)
+
+
+def cache_user(row: models.User) -> UserRecord:
+    """Put user record into cache"""
+
+    record = UserRecord(row.id, row.role, row.login, row.full_name)
+    user_cache.set(row.id, record, time.time() + cfg.USER_CACHE_TTL)
+    return record
+
+
+@sa.event.listens_for(so.Session, "after_commit")
+def _invalidate_users(session):
+    # повторный сброс после коммита: запись могли прочитать и положить
+    # в кэш параллельно, пока транзакция с изменением не завершилась
+    for user_id in session.info.pop(USER_CACHE_STALE, ()):
+        user_cache.pop(user_id)
+
+
+@sa.event.listens_for(so.Session, "after_rollback")
+def _discard_stale_users(session):
+    session.info.pop(USER_CACHE_STALE, None)
+
 
 class AbstractRepository(abc.ABC):
     """Base Repository"""
@@ -46,49 +113,209 @@ class BaseRepo(AbstractRepository):
     def delete(self, row):
         self.session.delete(row)
 
+    def _estimate(self) -> int | None:
+        """Row count estimate of planner statistics"""
+
+        cnt = self.session.execute(
+            sa.text(
+                "SELECT sum(c.reltuples)::bigint FROM pg_class c "
+                "WHERE c.oid = CAST(:table AS regclass) "
+                "OR c.oid IN (SELECT inhrelid FROM pg_inherits "
+                "WHERE inhparent = CAST(:table AS regclass))"
+            ),
+            {"table": self._model.__tablename__},
+        ).scalar()
+        # -1 у таблицы без статистики
+        return cnt if cnt is not None and cnt >= 0 else None
+
+    def _count(self, where, query: schemas.ArgsPaginate, *filters):
+        """Total rows by where according to LIST_COUNT_STRATEGY
+
+        ``filters`` - значения фильтров запроса, ключ кэша.
+        """
+
+        if not query.with_total:
+            return None
+
+        strategy = cfg.LIST_COUNT_STRATEGY
+        filtered = any(f is not None for f in filters)
+        if strategy == "estimate" and not filtered:
+            cnt = self._estimate()
+            if cnt is not None:
+                return cnt
+
+        def exact() -> int:
+            return self.session.execute(
+                sa.select(sa.func.count()).select_from(self._model).where(
+                    where,
+                )
+            ).scalar()
+
+        if strategy != "cached":
+            return exact()
+
+        table = self._model.__tablename__
+        key = (table, count_generation[table], *filters)
+        cnt = count_cache.get(key)
+        if cnt is None:
+            cnt = exact()
+            count_cache.set(key, cnt, time.time() + cfg.COUNT_CACHE_TTL)
+        return cnt
+
+    def _paginate(
+        self,
+        stmt: sa.sql.Select,
+        query: schemas.ArgsPaginate,
+        rank: sa.sql.ColumnElement = None,
+    ):
+        """Page of rows ordered by (created_at, id) desc and next cursor
+
+        С курсором страница читается по индексу с позиции последней
+        строки предыдущей страницы, без offset. При сортировке по
+        ``rank`` курсор не поддерживается, используется offset.
+        """
+
+        model = self._model
+        if rank is not None:
+            stmt = stmt.order_by(sa.desc(rank))
+        stmt = stmt.order_by(
+            sa.desc(model.created_at),
+            sa.desc(model.id),
+        ).limit(query.limit + 1)
+
+        if query.cursor and rank is None:
+            created_at, id_ = decode_cursor(query.cursor)
+            stmt = stmt.where(
+                sa.tuple_(model.created_at, model.id)
+                < sa.tuple_(created_at, id_)
+            )
+        else:
+            stmt = stmt.offset(query.offset)
+
+        rows = self.session.execute(stmt).scalars().all()
+
+        next_cursor = None
+        if len(rows) > query.limit:
+            rows = rows[: query.limit]
+            if rank is None:
+                next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+
+        return rows, next_cursor
+
+
+def _escape_like(value: str) -> str:
+    return (
+        value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    )
+
 
 @reg_repo.register("users")
 class UserRepository(BaseRepo):
 
     _model = models.User
 
-    def find_by(self, query: schemas.ArgsUser):
+    @staticmethod
+    def search_where(query: schemas.ArgsUser):
+        """Where and rank of user search
+
+        Условия ``ILIKE`` и ``%`` используют GIN индексы pg_trgm
+        на ``full_name`` и ``login``.
+        """
 
         where = sa.true()
         if query.full_name:
-            where &= models.User.full_name.ilike(f"%{query.full_name}%")
+            where &= models.User.full_name.ilike(
+                f"%{_escape_like(query.full_name)}%", escape="\\"
+            )
+
+        if query.login:
+            where &= models.User.login.ilike(
+                f"%{_escape_like(query.login)}%", escape="\\"
+            )
 
         if query.role:
             where &= models.User.role == query.role
 
+        rank = None
+        if query.q:
+            columns = (models.User.full_name, models.User.login)
+
+            if query.search == enums.UserSearch.SIMILAR:
+                where &= sa.or_(*(c.op("%")(query.q) for c in columns))
+                rank = sa.func.greatest(
+                    *(sa.func.similarity(c, query.q) for c in columns)
+                )
+            else:
+                pattern = _escape_like(query.q) + "%"
+                if query.search == enums.UserSearch.CONTAINS:
+                    pattern = "%" + pattern
+                where &= sa.or_(
+                    *(c.ilike(pattern, escape="\\") for c in columns)
+                )
+
+        return where, rank
+
+    def find_by(self, query: schemas.ArgsUser):
+
+        where, rank = self.search_where(query)
+
         # total rows by where
-        cnt = self.session.execute(
-            sa.select(sa.func.count(sa.distinct(models.User.id))).where(
-                where,
-            )
-        ).scalar()
+        cnt = self._count(
+            where,
+            query,
+            query.full_name,
+            query.login,
+            query.role,
+            query.q and (query.q, query.search),
+        )
 
-        sql = self.session.execute(
-            sa.select(models.User)
-            .where(
+        rows, next_cursor = self._paginate(
+            sa.select(models.User).where(
                 where,
-            )
-            .order_by(
-                sa.desc(models.User.created_at),
-            )
-            .limit(query.limit)
-            .offset(query.offset)
+            ),
+            query,
+            rank,
         )
 
-        rows = sql.scalars().all()
+        return rows, cnt, next_cursor
+
+    def get_record(self, id_: uuid.UUID) -> UserRecord | None:
+        """User record from per-worker cache
+
+        Запись живёт ``USER_CACHE_TTL`` секунд. При промахе строка берётся
+        из identity map сессии, если она уже загружена, иначе из БД.
+        """
+
+        record = user_cache.get(id_)
+        if record is not None:
+            return record
+
+        row = self.session.get(models.User, id_)
+        if row is None:
+            return None
+
+        return cache_user(row)
+
+    def invalidate(self, id_: uuid.UUID) -> None:
+        """Drop cached record now and once more after commit"""
 
-        return rows, cnt
+        user_cache.pop(id_)
+        self.session.info.setdefault(USER_CACHE_STALE, set()).add(id_)
+
+    # запросы горячих методов собираются один раз, при выполнении
+    # подставляются только параметры, ключ кэша компиляции не пересчитывается
+    _select = sa.select(models.User)
+    _select_by_login = _select.where(
+        models.User.login == sa.bindparam("login")
+    )
 
     def get_by(self, *, login: str = None):
-        where = sa.true()
         if login:
-            where &= models.User.login == login
-        sql = self.session.execute(sa.select(models.User).where(where))
+            sql = self.session.execute(
+                self._select_by_login, {"login": login}
+            )
+        else:
+            sql = self.session.execute(self._select)
         row = sql.scalar()
         return row
 
@@ -97,33 +324,29 @@ class UserRepository(BaseRepo):
 class TokenRepository(BaseRepo):
     _model = models.Session
 
+    @staticmethod
+    def _live_created_after() -> datetime.datetime:
+        """Sessions created earlier are expired, bound prunes partitions"""
+
+        now = datetime.datetime.now(datetime.timezone.utc)
+        return now - datetime.timedelta(minutes=cfg.REFRESH_TOKEN_TTL, days=1)
+
     def find_by(self, query: schemas.ArgsPaginate):
         where = sa.true()
 
         where &= models.Session.user_id == g.current_user.id
 
         # total rows by where
-        cnt = self.session.execute(
-            sa.select(sa.func.count(sa.distinct(models.Session.id))).where(
-                where,
-            )
-        ).scalar()
+        cnt = self._count(where, query, g.current_user.id)
 
-        sql = self.session.execute(
-            sa.select(models.Session)
-            .where(
+        rows, next_cursor = self._paginate(
+            sa.select(models.Session).where(
                 where,
-            )
-            .order_by(
-                sa.desc(models.Session.created_at),
-            )
-            .limit(query.limit)
-            .offset(query.offset)
+            ),
+            query,
         )
 
-        rows = sql.scalars().all()
-
-        return rows, cnt
+        return rows, cnt, next_cursor
 
     def fetch_by(
         self,
@@ -144,14 +367,131 @@ class TokenRepository(BaseRepo):
 
         return rows
 
+    _select = sa.select(models.Session)
+    _select_by_token = _select.where(
+        models.Session.token_hash == sa.bindparam("token_hash"),
+        models.Session.created_at > sa.bindparam("created_after"),
+    )
+
     def get_by(self, *, token: uuid.UUID = None):
-        where = sa.true()
         if token:
-            where &= models.Session.token == str(token)
-        sql = self.session.execute(sa.select(models.Session).where(where))
+            sql = self.session.execute(
+                self._select_by_token,
+                {
+                    "token_hash": models.hash_token(token),
+                    "created_after": self._live_created_after(),
+                },
+            )
+        else:
+            sql = self.session.execute(self._select)
         row = sql.scalar()
         return row
 
+    @classmethod
+    def _consume_stmt(cls, token: uuid.UUID, now: datetime.datetime):
+        return (
+            sa.update(models.Session)
+            .where(
+                models.Session.token_hash == models.hash_token(token),
+                models.Session.created_at > cls._live_created_after(),
+                models.Session.expired_at > now,
+            )
+            .values(expired_at=None)
+            .returning(
+                models.Session.id.label("session_id"),
+                models.Session.user_id,
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+    def consume(self, *, token: uuid.UUID, now: datetime.datetime):
+        """Revoke active session and return its id and user_id"""
+
+        sql = self.session.execute(self._consume_stmt(token, now))
+        row = sql.first()
+        return row
+
+    def revoke(
+        self,
+        *,
+        now: datetime.datetime,
+        user_id: uuid.UUID = None,
+        role: str = None,
+        session_ids: list[uuid.UUID] = None,
+        created_before: datetime.datetime = None,
+    ) -> list[uuid.UUID]:
+        """Revoke active sessions by filters in one UPDATE"""
+
+        if (
+            user_id is None
+            and role is None
+            and session_ids is None
+            and created_before is None
+        ):
+            raise ValueError("At least one filter is required")
+
+        where = models.Session.expired_at > now
+        where &= models.Session.created_at > self._live_created_after()
+
+        if user_id:
+            where &= models.Session.user_id == user_id
+
+        if role:
+            where &= models.Session.user_id == models.User.id
+            where &= models.User.role == role
+
+        if session_ids is not None:
+            where &= models.Session.id.in_(session_ids)
+
+        if created_before:
+            where &= models.Session.created_at < created_before
+
+        sql = self.session.execute(
+            sa.update(models.Session)
+            .where(where)
+            .values(expired_at=None)
+            .returning(models.Session.id)
+            .execution_options(synchronize_session=False)
+        )
+        rows = sql.scalars().all()
+
+        return rows
+
+    @staticmethod
+    def _revoked_stmt(updated_after: datetime.datetime):
+        return sa.select(models.Session.id, models.Session.updated_at).where(
+            models.Session.expired_at.is_(None),
+            models.Session.updated_at > updated_after,
+        )
+
+    def fetch_revoked(self, *, updated_after: datetime.datetime):
+        """Ids of sessions revoked after timestamp"""
+
+        sql = self.session.execute(self._revoked_stmt(updated_after))
+        rows = sql.all()
+
+        return rows
+
+    @classmethod
+    def _by_tokens_stmt(cls, tokens: list[uuid.UUID]):
+        return sa.select(models.Session).where(
+            models.Session.token_hash.in_(
+                {models.hash_token(t) for t in tokens}
+            ),
+            models.Session.created_at > cls._live_created_after(),
+        )
+
+    def fetch_by_tokens(self, tokens: list[uuid.UUID]):
+        """Sessions by refresh tokens in one query"""
+
+        if not tokens:
+            return []
+
+        sql = self.session.execute(self._by_tokens_stmt(tokens))
+        rows = sql.scalars().all()
+
+        return rows
+
 
 @reg_repo.register("login_history")
 class HistoryRepository(BaseRepo):
@@ -160,12 +500,22 @@ class HistoryRepository(BaseRepo):
     def find_by(self, query: schemas.BaseModel):
         pass
 
-    def fetch_by(
-            self,
-            *,
-            user_id: uuid.UUID = None,
-            after: datetime.datetime = None,
-            before: datetime.datetime = None,
+    def record(self, *, user_id: uuid.UUID, user_agent: str | None):
+        """Add login, through write-behind buffer if it is enabled"""
+
+        if history_writer.enabled:
+            history_writer.add(user_id=user_id, user_agent=user_agent)
+        else:
+            self.add(
+                models.LoginHistory(user_id=user_id, user_agent=user_agent)
+            )
+
+    @staticmethod
+    def _where(
+        *,
+        user_id: uuid.UUID = None,
+        after: datetime.datetime = None,
+        before: datetime.datetime = None,
     ):
         where = sa.true()
 
@@ -178,10 +528,74 @@ class HistoryRepository(BaseRepo):
         if before:
             where &= models.LoginHistory.logged_in_at < before
 
-        sql = self.session.execute(sa.select(models.LoginHistory).where(where))
+        return where
+
+    def fetch_by(
+        self,
+        *,
+        user_id: uuid.UUID = None,
+        after: datetime.datetime = None,
+        before: datetime.datetime = None,
+        cursor: str = None,
+        limit: int = 50,
+    ):
+        """Page of logins, newest first, and next cursor
+
+        Вход пользователя уникален по (user_id, logged_in_at), поэтому
+        курсором служит время последнего входа на странице, страница
+        читается по индексу этого ограничения в обратном порядке.
+        """
+
+        # lambda_stmt кэшируется по коду лямбд и набору фильтров,
+        # значения из замыканий становятся параметрами запроса
+        model = models.LoginHistory
+        fetch = limit + 1
+        stmt = sa.lambda_stmt(lambda: sa.select(model))
+        if user_id:
+            stmt += lambda s: s.where(model.user_id == user_id)
+        if after:
+            stmt += lambda s: s.where(model.logged_in_at > after)
+        if before:
+            stmt += lambda s: s.where(model.logged_in_at < before)
+        if cursor:
+            logged_in_at, _ = decode_cursor(cursor)
+            stmt += lambda s: s.where(model.logged_in_at < logged_in_at)
+        stmt += lambda s: s.order_by(sa.desc(model.logged_in_at)).limit(fetch)
+
+        sql = self.session.execute(stmt)
         rows = sql.scalars().all()
 
-        return rows
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1].logged_in_at, rows[-1].id)
+
+        return rows, next_cursor
+
+    def iter_by(
+        self,
+        *,
+        user_id: uuid.UUID = None,
+        after: datetime.datetime = None,
+        before: datetime.datetime = None,
+        batch_size: int = 1000,
+    ):
+        """Iterate all logins through server-side cursor
+
+        Строки читаются пачками по ``batch_size`` и не попадают
+        в identity map, память не зависит от размера истории.
+        """
+
+        model = models.LoginHistory
+        sql = self.session.execute(
+            sa.select(
+                model.id, model.user_id, model.logged_in_at, model.user_agent
+            )
+            .where(self._where(user_id=user_id, after=after, before=before))
+            .order_by(sa.desc(model.logged_in_at))
+            .execution_options(yield_per=batch_size)
+        )
+        yield from sql
 
 
 @reg_repo.register("oauth_users")
@@ -0,0 +1,92 @@
+import random
+import time
+
+import sqlalchemy as sa
+from flask import has_request_context, request
+from flask_sqlalchemy.session import Session
+from opentelemetry import trace
+
+from ..config import cfg
+
+REPLICA_PREFIX = "replica_"
+# время (unix timestamp), до которого чтения клиента идут на primary
+STICKY_COOKIE = "db_primary_until"
+
+
+class RoutingSession(Session):
+    """Session routing reads to replica
+
+    Если для сессии выбрана реплика (``route_reads``), на неё уходят
+    только SELECT до первой записи в транзакции, всё остальное
+    выполняется на primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        replica = self.info.get("replica")
+        if (
+            replica
+            and bind is None
+            and not self._flushing
+            and not self.info.get("wrote")
+            # select и lambda_stmt с select внутри
+            and getattr(clause, "is_select", False)
+        ):
+            return self._db.engines[replica]
+
+        return super().get_bind(mapper, clause, bind, **kwargs)
+
+
+@sa.event.listens_for(RoutingSession, "after_flush")
+def _after_flush(session, flush_context):
+    # после записи читаем свои изменения с primary
+    session.info["wrote"] = True
+
+
+def replicas(session: Session) -> list[str]:
+    return [
+        key
+        for key in session._db.engines
+        if key and key.startswith(REPLICA_PREFIX)
+    ]
+
+
+def route_reads(session: Session) -> str | None:
+    """Choose replica for reads of session, None - primary"""
+
+    span = trace.get_current_span()
+    keys = replicas(session)
+
+    if not keys:
+        reason, replica = "no_replicas", None
+    elif (
+        has_request_context()
+        and _sticky_until(request.cookies.get(STICKY_COOKIE)) > time.time()
+    ):
+        reason, replica = "sticky", None
+    else:
+        reason, replica = "read_only", random.choice(keys)
+
+    session.info["replica"] = replica
+    span.set_attribute("db.route", replica or "primary")
+    span.set_attribute("db.route.reason", reason)
+    return replica
+
+
+def stick_to_primary(response):
+    """Route reads of client to primary for DB_REPLICA_STICKY seconds"""
+
+    # следующие чтения клиента увидят его запись
+    response.set_cookie(
+        STICKY_COOKIE,
+        str(time.time() + cfg.DB_REPLICA_STICKY),
+        max_age=cfg.DB_REPLICA_STICKY,
+        httponly=True,
+    )
+    return response
+
+
+def _sticky_until(value: str | None) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
@@ -0,0 +1,288 @@
+import csv
+import io
+import json
+import os
+import time
+import uuid
+from concurrent.futures import Executor, ProcessPoolExecutor
+from itertools import islice
+from typing import Iterable, Iterator
+
+import sqlalchemy as sa
+from loguru import logger
+
+from ..entrypoints import enums
+from ..utils.passwords import generate_password_hash
+
+ROLES = {role.value for role in enums.UserRole}
+# методы хэшей werkzeug, которые принимаются без перехэширования
+HASH_PREFIXES = ("pbkdf2:", "scrypt:")
+# длина varchar полей users, длинная строка сорвала бы COPY всей пачки
+MAX_LENGTH = 255
+
+STAGING_TABLE = "users_import"
+CREATE_STAGING = f"""
+CREATE TEMP TABLE IF NOT EXISTS {STAGING_TABLE} (
+    line bigint NOT NULL,
+    id uuid NOT NULL,
+    login varchar({MAX_LENGTH}) NOT NULL,
+    full_name varchar({MAX_LENGTH}),
+    role varchar({MAX_LENGTH}) NOT NULL,
+    password varchar({MAX_LENGTH}) NOT NULL
+) ON COMMIT DELETE ROWS
+"""
+COPY_STAGING = (
+    f"COPY {STAGING_TABLE} (line, id, login, full_name, role, password) "
+    "FROM STDIN WITH (FORMAT csv)"
+)
+# при повторе логина в файле побеждает последняя строка
+MERGE = f"""
+INSERT INTO users (id, login, full_name, role, password, created_at,
+                   updated_at)
+SELECT DISTINCT ON (login) id, login, full_name, role, password, now(), now()
+FROM {STAGING_TABLE}
+ORDER BY login, line DESC
+ON CONFLICT (login) DO {{action}}
+"""
+MERGE_UPDATE = (
+    "UPDATE SET full_name = EXCLUDED.full_name, role = EXCLUDED.role, "
+    "password = EXCLUDED.password, updated_at = EXCLUDED.updated_at"
+)
+
+
+def is_password_hash(value: str) -> bool:
+    """Value is a password hash in werkzeug format ``method$salt$hash``"""
+
+    return value.startswith(HASH_PREFIXES) and value.count("$") == 2
+
+
+def read_records(path: str, fmt: str = None) -> Iterator[dict]:
+    """Stream records of CSV with header or NDJSON file"""
+
+    fmt = fmt or ("ndjson" if path.endswith((".ndjson", ".jsonl")) else "csv")
+    with open(path, newline="", encoding="utf-8") as f:
+        if fmt == "csv":
+            yield from csv.DictReader(f)
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+class Checkpoint:
+    """Number of input records already imported
+
+    Сохраняется после коммита каждой пачки. Если процесс упал между
+    коммитом и записью файла, пачка загрузится повторно, а слияние
+    по логину сделает это без дублей.
+    """
+
+    def __init__(self, path: str, source: str):
+        self.path = path
+        self.source = os.path.abspath(source)
+        self.offset = 0
+        self.imported = 0
+        self.skipped = 0
+
+    def load(self) -> "Checkpoint":
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                data = json.load(f)
+            if data.get("source") == self.source:
+                self.offset = data["offset"]
+                self.imported = data["imported"]
+                self.skipped = data["skipped"]
+        return self
+
+    def save(self) -> None:
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(
+                dict(
+                    source=self.source,
+                    offset=self.offset,
+                    imported=self.imported,
+                    skipped=self.skipped,
+                ),
+                f,
+            )
+        os.replace(tmp, self.path)
+
+
+class UserImporter:
+    """Bulk user import
+
+    Пароли хэшируются в пуле процессов пачками по ``batch_size``,
+    пока предыдущая пачка загружается в БД. Пачка копируется через
+    ``COPY`` во временную таблицу и сливается в ``users`` одним
+    ``INSERT ... ON CONFLICT (login)``, каждая пачка - своя транзакция.
+    """
+
+    def __init__(
+        self,
+        engine: sa.engine.Engine,
+        method: str,
+        checkpoint: Checkpoint,
+        batch_size: int = 10000,
+        executor: Executor = None,
+        update: bool = False,
+    ):
+        self.engine = engine
+        self.method = method
+        self.checkpoint = checkpoint
+        self.batch_size = batch_size
+        self.executor = executor
+        self.update = update
+
+    @staticmethod
+    def prepare(line: int, record: dict) -> tuple | None:
+        """Staging row with hash or plain password, None if invalid
+
+        Готовый хэш берётся из поля ``password_hash``, пароль из поля
+        ``password`` хэшируется методом из настроек.
+        """
+
+        login = (record.get("login") or "").strip()
+        full_name = record.get("full_name") or None
+        role = record.get("role") or enums.UserRole.USER.value
+        pwhash = record.get("password_hash") or None
+        password = None if pwhash else record.get("password") or None
+        if (
+            not login
+            or len(login) > MAX_LENGTH
+            or (full_name and len(full_name) > MAX_LENGTH)
+            or role not in ROLES
+            or (
+                pwhash
+                and (not is_password_hash(pwhash) or len(pwhash) > MAX_LENGTH)
+            )
+            or not (pwhash or password)
+        ):
+            logger.warning(f"Record {line} skipped: {record.get('login')!r}")
+            return None
+        return (
+            line,
+            uuid.uuid4(),
+            login,
+            full_name,
+            role,
+            pwhash,
+            password,
+        )
+
+    def _hash(self, rows: list[tuple]) -> Iterator[str]:
+        """Password hashes of rows, plain passwords are hashed in pool"""
+
+        plain = [row[-1] for row in rows if row[-2] is None]
+        if self.executor is None:
+            hashed = (generate_password_hash(p, self.method) for p in plain)
+        else:
+            # map отправляет задачи в пул сразу, результаты ждём при записи
+            hashed = self.executor.map(
+                generate_password_hash,
+                plain,
+                [self.method] * len(plain),
+                chunksize=max(len(plain) // 64, 1),
+            )
+
+        hashed = iter(hashed)
+        return (row[-2] or next(hashed) for row in rows)
+
+    def _copy(self, conn, rows: list[tuple], hashes: Iterable[str]) -> int:
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        for row, pwhash in zip(rows, hashes):
+            writer.writerow((*row[:-2], pwhash))
+        buf.seek(0)
+
+        action = MERGE_UPDATE if self.update else "NOTHING"
+        with conn.cursor() as cursor:
+            cursor.copy_expert(COPY_STAGING, buf)
+            cursor.execute(MERGE.format(action=action))
+            imported = cursor.rowcount
+        conn.commit()
+        return imported
+
+    def run(self, records: Iterable[dict]) -> Checkpoint:
+        checkpoint = self.checkpoint
+        records = enumerate(records, start=1)
+        # записи, загруженные прошлым запуском
+        for _ in islice(records, checkpoint.offset):
+            pass
+
+        started = time.monotonic()
+        processed = 0
+        conn = self.engine.raw_connection()
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(CREATE_STAGING)
+            conn.commit()
+
+            pending = None
+            while True:
+                batch = list(islice(records, self.batch_size))
+                job = None
+                if batch:
+                    rows = [self.prepare(line, r) for line, r in batch]
+                    valid = [row for row in rows if row is not None]
+                    # следующая пачка хэшируется, пока пишется текущая
+                    job = (batch, valid, self._hash(valid))
+
+                if pending is not None:
+                    done, valid, hashes = pending
+                    checkpoint.imported += self._copy(conn, valid, hashes)
+                    checkpoint.skipped += len(done) - len(valid)
+                    checkpoint.offset = done[-1][0]
+                    checkpoint.save()
+
+                    processed += len(done)
+                    rate = processed / (time.monotonic() - started)
+                    logger.info(
+                        f"{checkpoint.offset:,} records read, "
+                        f"{checkpoint.imported:,} imported, "
+                        f"{checkpoint.skipped:,} skipped, "
+                        f"{rate:,.0f} records/s"
+                    )
+
+                if job is None:
+                    break
+                pending = job
+        finally:
+            conn.close()
+
+        return checkpoint
+
+
+def import_users(
+    engine: sa.engine.Engine,
+    path: str,
+    method: str,
+    fmt: str = None,
+    checkpoint_path: str = None,
+    restart: bool = False,
+    batch_size: int = 10000,
+    workers: int = None,
+    update: bool = False,
+) -> Checkpoint:
+    """Import users of CSV/NDJSON file, resuming from checkpoint"""
+
+    checkpoint = Checkpoint(checkpoint_path or f"{path}.checkpoint", path)
+    if not restart:
+        checkpoint.load()
+        if checkpoint.offset:
+            logger.info(f"Resuming after record {checkpoint.offset:,}")
+
+    executor = ProcessPoolExecutor(workers) if workers != 0 else None
+    try:
+        importer = UserImporter(
+            engine,
+            method,
+            checkpoint,
+            batch_size=batch_size,
+            executor=executor,
+            update=update,
+        )
+        return importer.run(read_records(path, fmt))
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
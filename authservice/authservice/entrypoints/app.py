@@ -7,8 +7,10 @@ from flask import Flask, g, request
 from flask import typing as ft
 from flask.json.provider import DefaultJSONProvider as _JSONProvider
 from flask.wrappers import Request
+from werkzeug.middleware.proxy_fix import ProxyFix
 
 from ..config import cfg
+from ..database.history_writer import history_writer
 from ..entrypoints.blueprints import init_blueprint
 from ..entrypoints.errorhandler import init_errorhandler
 from ..entrypoints.extensions import init_extensions
@@ -37,6 +39,10 @@ def create_app() -> Flask:
     app = Flask(__name__)
     app.config.from_object(cfg)
 
+    if cfg.PROXY_FIX_X_FOR:
+        # адрес клиента для ограничения попыток входа берём из nginx
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=cfg.PROXY_FIX_X_FOR)
+
     app.json = _CustomJSONProvider(app)
     app.json.sort_keys = False
 
@@ -49,6 +55,10 @@ def create_app() -> Flask:
     # init errorhandler
     init_errorhandler(app)
 
+    history_writer.init_app(app)
+
+    token_manager = TokenManager()
+
     @app.before_request
     def _before_request_handler() -> None:
         version = app.config.get("API_VERSION")
@@ -84,9 +94,6 @@ def create_app() -> Flask:
         g.current_user = None
         h_access_token = request.headers.get("X-Auth-Token")
         if h_access_token:
-            token_manager = (
-                TokenManager()
-            )  # todo вынести инициализацию токен-менеджера куда-нибудь ещё...
             g.current_user = token_manager.decode_access_token(h_access_token)
 
     @app.after_request
@@ -0,0 +1,265 @@
+import asyncio
+import contextlib
+import http
+
+from loguru import logger
+from pydantic import BaseModel, ValidationError
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Mount, Route
+from werkzeug.exceptions import HTTPException, abort
+
+from .. import schemas
+from ..config import cfg
+from ..database.aio import async_db
+from ..database.routing import stick_to_primary
+from ..tokens.async_tokens import AsyncTokenManager, async_revocation_list
+from ..unit_of_work import AsyncUnitOfWork
+from ..utils.passwords import password_hasher
+from ..utils.throttling import login_throttle
+from . import enums
+from .errorhandler import (
+    MSG_FORBIDDEN,
+    MSG_INTERNAL_ERROR,
+    MSG_POOL_TIMEOUT,
+    MSG_SQLALCHEMY_ERROR,
+    MSG_UNAUTHORIZED,
+)
+
+# сообщения кодов, для которых Flask приложение заменяет description
+MESSAGES = {
+    http.HTTPStatus.UNAUTHORIZED: MSG_UNAUTHORIZED,
+    http.HTTPStatus.FORBIDDEN: MSG_FORBIDDEN,
+    http.HTTPStatus.INTERNAL_SERVER_ERROR: MSG_INTERNAL_ERROR,
+}
+
+
+def _json(schema: BaseModel, status: int = http.HTTPStatus.OK) -> Response:
+    return Response(
+        schema.json(), status_code=status, media_type="application/json"
+    )
+
+
+def _write_response(uow: AsyncUnitOfWork, schema: BaseModel) -> Response:
+    response = _json(schema)
+    # как MethodView Flask приложения после фиксации транзакции
+    if uow.committed and cfg.DB_REPLICA_URIS:
+        stick_to_primary(response)
+    return response
+
+
+async def _parse(request: Request, model: type[BaseModel]):
+    try:
+        body = await request.json()
+    except ValueError:
+        abort(http.HTTPStatus.BAD_REQUEST)
+    return model.parse_obj(body)
+
+
+def _current_user(
+    request: Request, token_manager: AsyncTokenManager
+) -> schemas.JWTPayload:
+    h_access_token = request.headers.get("X-Auth-Token")
+    user = h_access_token and token_manager.decode_access_token(
+        h_access_token
+    )
+    if not user:
+        abort(http.HTTPStatus.UNAUTHORIZED)
+    return user
+
+
+async def login(request: Request) -> Response:
+    """Login User"""
+
+    json = await _parse(request, schemas.ReqLogin)
+    ip = request.client.host if request.client else None
+
+    # до запроса в БД и хэширования пароля
+    login_throttle.check(json.login, ip)
+
+    async with AsyncUnitOfWork() as uow:
+        row = await uow.users.get_by(login=json.login)
+        if not row:
+            login_throttle.failure(json.login, ip)
+            abort(http.HTTPStatus.NOT_FOUND)
+
+        # хэш считается в пуле процессов, event loop не блокируется
+        if not await asyncio.to_thread(
+            password_hasher.check, row.password, json.password
+        ):
+            login_throttle.failure(json.login, ip)
+            abort(http.HTTPStatus.UNAUTHORIZED)
+
+        login_throttle.success(json.login, ip)
+        if password_hasher.needs_rehash(row.password):
+            row.password = await asyncio.to_thread(
+                password_hasher.generate, json.password
+            )
+
+        uow.login_history.record(
+            user_id=row.id,
+            user_agent=request.headers.get("user-agent"),
+        )
+        # токен, история и новый хэш фиксируются одной транзакцией
+        access_token, refresh_token = await AsyncTokenManager(
+            uow
+        ).get_token_pair(row.id)
+
+    return _write_response(
+        uow,
+        schemas.RespLogon(
+            id=row.id,
+            access_token=access_token,
+            refresh_token=refresh_token,
+        ),
+    )
+
+
+async def refresh_token(request: Request) -> Response:
+    """Refresh Token"""
+
+    json = await _parse(request, schemas.ReqRefreshToken)
+
+    async with AsyncUnitOfWork() as uow:
+        token_pair = await AsyncTokenManager(uow).refresh_access_token(
+            json.refresh_token
+        )
+    if not token_pair:
+        abort(http.HTTPStatus.UNAUTHORIZED)
+
+    access_token, refresh_token = token_pair
+    return _write_response(
+        uow,
+        schemas.RespLogon(
+            access_token=access_token, refresh_token=refresh_token
+        ),
+    )
+
+
+async def logout(request: Request) -> Response:
+    """Logout User"""
+
+    async with AsyncUnitOfWork() as uow:
+        token_manager = AsyncTokenManager(uow)
+        _current_user(request, token_manager)
+
+        json = await _parse(request, schemas.ReqLogout)
+        if not token_manager.check_access_token(json.access_token):
+            abort(http.HTTPStatus.UNAUTHORIZED)
+        await token_manager.invalidate_token(json.refresh_token)
+
+    return _write_response(uow, schemas.RespMessage(message="OK"))
+
+
+async def introspect(request: Request) -> Response:
+    """Check many access and refresh tokens at once"""
+
+    async with AsyncUnitOfWork() as uow:
+        token_manager = AsyncTokenManager(uow)
+        # как role_required(UserRole.ADMIN) Flask приложения
+        user = _current_user(request, token_manager)
+        if user.role != enums.UserRole.ADMIN.value:
+            abort(http.HTTPStatus.FORBIDDEN)
+
+        json = await _parse(request, schemas.ReqIntrospect)
+        schema = await token_manager.introspect(
+            json.access_tokens,
+            json.refresh_tokens,
+        )
+
+    return _json(schema)
+
+
+async def handle_http_exception(request: Request, e: HTTPException):
+    logger.error(e)
+
+    headers = {k: v for k, v in e.get_headers() if k == "Retry-After"}
+    return JSONResponse(
+        dict(message=MESSAGES.get(e.code, e.description)),
+        status_code=e.code,
+        headers=headers,
+    )
+
+
+async def handle_validation(request: Request, e: ValidationError):
+    logger.error(e)
+
+    return JSONResponse(
+        dict(message=e.errors()),
+        status_code=http.HTTPStatus.BAD_REQUEST,
+    )
+
+
+async def handle_pool_timeout(request: Request, e: PoolTimeoutError):
+    # все соединения пула заняты дольше DB_POOL_TIMEOUT
+    logger.error(e)
+
+    return JSONResponse(
+        dict(message=MSG_POOL_TIMEOUT),
+        status_code=http.HTTPStatus.SERVICE_UNAVAILABLE,
+        headers={"Retry-After": "1"},
+    )
+
+
+async def handle_sqlalchemy(request: Request, e: SQLAlchemyError):
+    logger.exception(e)
+
+    return JSONResponse(
+        dict(message=MSG_SQLALCHEMY_ERROR),
+        status_code=http.HTTPStatus.INTERNAL_SERVER_ERROR,
+    )
+
+
+def _start_revocation_sync() -> asyncio.Task:
+    task = asyncio.create_task(async_revocation_list.run())
+    task.add_done_callback(_restart_revocation_sync)
+    return task
+
+
+def _restart_revocation_sync(task: asyncio.Task) -> None:
+    # без синхронизации воркер принимал бы отозванные токены
+    if task.cancelled():
+        return
+    logger.error(f"Revocation list sync stopped: {task.exception()!r}")
+    _start_revocation_sync()
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app: Starlette):
+    async_db.init()
+    sync_task = _start_revocation_sync()
+    try:
+        yield
+    finally:
+        sync_task.remove_done_callback(_restart_revocation_sync)
+        sync_task.cancel()
+        await async_db.dispose()
+
+
+def create_asgi_app() -> Starlette:
+    """ASGI приложение для входа, обновления, выхода и проверки токенов
+
+    Те же URL и схемы, что у Flask приложения, запросы к БД через
+    asyncpg. Остальные методы API обслуживает Flask приложение.
+    """
+
+    routes = [
+        Route("/login", login, methods=["POST"]),
+        Route("/refresh-token", refresh_token, methods=["POST"]),
+        Route("/logout", logout, methods=["POST"]),
+        Route("/introspect", introspect, methods=["POST"]),
+    ]
+
+    return Starlette(
+        routes=[Mount("/api/v1/user", routes=routes)],
+        exception_handlers={
+            HTTPException: handle_http_exception,
+            ValidationError: handle_validation,
+            PoolTimeoutError: handle_pool_timeout,
+            SQLAlchemyError: handle_sqlalchemy,
+        },
+        lifespan=lifespan,
+    )
@@ -1,6 +1,7 @@
 from flask import Blueprint, Flask
 
 from ..entrypoints.endpoints import bp_v1
+from ..entrypoints.endpoints.metrics import bp as bp_metrics
 
 bp_api = Blueprint("api", __name__, url_prefix="/api")
 
@@ -13,6 +14,9 @@ def init_blueprint(app: Flask) -> Flask:
     # url api
     app.register_blueprint(bp_api)
 
+    # метрики вне /api, nginx их наружу не проксирует
+    app.register_blueprint(bp_metrics)
+
     return app
 
 
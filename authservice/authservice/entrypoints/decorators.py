@@ -4,6 +4,7 @@ from typing import Callable, Optional, List, Dict
 
 from flask import abort, g
 
+from ..unit_of_work import current_uow
 from .enums import UserRole
 
 
@@ -45,3 +46,14 @@ def role_required(*roles: UserRole) -> Callable:
         return decorated_view
 
     return wrapper
+
+
+def use_replica(fn: Callable) -> Callable:
+    """Read from replica, if any"""
+
+    @wraps(fn)
+    def decorated_view(*args: List, **kwargs: Dict) -> Optional[Callable]:
+        current_uow().use_replica()
+        return fn(*args, **kwargs)
+
+    return decorated_view
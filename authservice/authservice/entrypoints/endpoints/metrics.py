@@ -0,0 +1,15 @@
+from flask import Blueprint, current_app
+
+from authservice.utils.metrics import metrics
+
+bp = Blueprint("metrics", __name__)
+
+
+@bp.get("/metrics")
+def get_metrics():
+    """Metrics in Prometheus text format"""
+
+    return current_app.response_class(
+        metrics.render(),
+        mimetype="text/plain; version=0.0.4",
+    )
@@ -1,12 +1,23 @@
+from flask import after_this_request
 from flask.views import MethodView as FlaskMethodView
 
+from authservice.config import cfg
+from authservice.database.routing import stick_to_primary
+
 from authservice.tokens.tokens import TokenManager
-from authservice.unit_of_work import UnitOfWork
+from authservice.unit_of_work import UnitOfWork, current_uow
 
 
 class MethodView(FlaskMethodView):
     """Redefined MethodView from Flask"""
 
     def __init__(self, *args, **kwargs):
-        self._uow: UnitOfWork = UnitOfWork()
+        self._uow: UnitOfWork = current_uow()
         self.token_manager: TokenManager = TokenManager()
+
+    def dispatch_request(self, *args, **kwargs):
+        rv = super().dispatch_request(*args, **kwargs)
+        # одна фиксация транзакции на запрос
+        if self._uow.complete() and cfg.DB_REPLICA_URIS:
+            after_this_request(stick_to_primary)
+        return rv
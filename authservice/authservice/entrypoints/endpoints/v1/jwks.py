@@ -0,0 +1,40 @@
+import http
+
+from flask import Blueprint
+from spectree import Response
+
+from authservice import schemas
+from authservice.config import cfg
+from authservice.entrypoints.extensions import spec_tree
+from authservice.utils.jwt_utils import keyring
+from ._init import MethodView
+
+bp = Blueprint("jwks", __name__, url_prefix="/.well-known")
+
+TAG = "JWKS"
+
+
+class JWKSApi(MethodView):
+    """JWKS Endpoint"""
+
+    @spec_tree.validate(
+        resp=Response(HTTP_200=schemas.RespJWKS),
+        tags=[TAG],
+    )
+    def get(self):
+        """Public keys for access token verification"""
+
+        schema = schemas.RespJWKS(keys=keyring.jwks())
+
+        return (
+            schema,
+            http.HTTPStatus.OK,
+            {"Cache-Control": f"public, max-age={cfg.JWKS_MAX_AGE}"},
+        )
+
+
+bp.add_url_rule(
+    "/jwks.json",
+    view_func=JWKSApi.as_view("jwks"),
+    methods=["GET"],
+)
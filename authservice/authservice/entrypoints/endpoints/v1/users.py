@@ -5,14 +5,27 @@ import uuid
 
 from authservice import schemas
 from authservice.database import models
-from flask import Blueprint, abort, g
+from flask import (
+    Blueprint,
+    abort,
+    current_app,
+    g,
+    request,
+    stream_with_context,
+)
 from spectree import Response
-from werkzeug.security import check_password_hash, generate_password_hash
 
 from authservice.entrypoints import enums
-from authservice.entrypoints.decorators import role_required, login_required
+from authservice.entrypoints.decorators import (
+    login_required,
+    role_required,
+    use_replica,
+)
 from authservice.entrypoints.extensions import spec_tree
+from authservice.tokens.tokens import revocation_list
 from authservice.utils.oauth_utils import get_provider
+from authservice.utils.passwords import password_hasher
+from authservice.utils.throttling import login_throttle
 from ._init import MethodView
 
 bp = Blueprint("user", __name__, url_prefix="/user")
@@ -36,7 +49,7 @@ class UserSignupApi(MethodView):
                 role=enums.UserRole.USER,
             )
 
-            row.password = generate_password_hash(json.password)
+            row.password = password_hasher.generate(json.password)
 
             self._uow.users.add(row)
             self._uow.commit()
@@ -52,29 +65,40 @@ class UserLoginApi(MethodView):
     """User Login Endpoint"""
 
     @spec_tree.validate(
-        resp=Response("HTTP_400", "HTTP_401", HTTP_200=schemas.RespLogon),
+        resp=Response(
+            "HTTP_400", "HTTP_401", "HTTP_429", HTTP_200=schemas.RespLogon
+        ),
         tags=[TAG + "Users"],
     )
     def post(self, json: schemas.ReqLogin):
         """Login User"""
 
+        # до запроса в БД и хэширования пароля
+        login_throttle.check(json.login, request.remote_addr)
+
         with self._uow:
             row = self._uow.users.get_by(login=json.login)
 
             if not row:
+                login_throttle.failure(json.login, request.remote_addr)
                 abort(http.HTTPStatus.NOT_FOUND)
 
-        if check_password_hash(row.password, json.password):
+        if password_hasher.check(row.password, json.password):
+            login_throttle.success(json.login, request.remote_addr)
+            if password_hasher.needs_rehash(row.password):
+                # пароль захэширован с устаревшими параметрами
+                with self._uow:
+                    row.password = password_hasher.generate(json.password)
+                    self._uow.commit()
+
             access_token, refresh_token = self.token_manager.get_token_pair(
                 row.id
             )
             with self._uow:
-                row = models.LoginHistory(
+                self._uow.login_history.record(
                     user_id=row.id,
-                    user_agent=g.user_agent
+                    user_agent=g.user_agent,
                 )
-
-                self._uow.login_history.add(row)
                 self._uow.commit()
 
             schema = schemas.RespLogon(
@@ -84,6 +108,7 @@ class UserLoginApi(MethodView):
             )
             return schema, http.HTTPStatus.OK
         else:
+            login_throttle.failure(json.login, request.remote_addr)
             abort(http.HTTPStatus.UNAUTHORIZED)
 
 
@@ -107,12 +132,10 @@ class UserOAuthApi(MethodView):
                     remote_user.user_id
                 )
 
-                history_row = models.LoginHistory(
+                self._uow.login_history.record(
                     user_id=remote_user.user_id,
-                    user_agent=g.user_agent
+                    user_agent=g.user_agent,
                 )
-
-                self._uow.login_history.add(history_row)
                 self._uow.commit()
                 return schemas.RespLogonOAuth(access_token=access_token,
                                               refresh_token=refresh_token,
@@ -123,7 +146,7 @@ class UserOAuthApi(MethodView):
                 row = models.User(
                     login=user_info.login,
                     role=enums.UserRole.USER,
-                    password=generate_password_hash(random_password)
+                    password=password_hasher.generate(random_password)
                 )
                 self._uow.users.add(row)
                 self._uow.commit()
@@ -182,21 +205,42 @@ class UserRefreshTokenApi(MethodView):
         resp=Response("HTTP_400", "HTTP_401", HTTP_200=schemas.RespLogon)
     )
     def post(self, json: schemas.ReqRefreshToken):
-        if not self.token_manager.check_refresh_token(json.refresh_token):
-            abort(http.HTTPStatus.UNAUTHORIZED)
-        try:
-            (
-                access_token,
-                refresh_token,
-            ) = self.token_manager.refresh_access_token(json.refresh_token)
-            schema = schemas.RespLogon(
-                access_token=access_token, refresh_token=refresh_token
-            )
-            return schema, http.HTTPStatus.OK
-        except TypeError:
-            # вместо токенов вернулся None
+        token_pair = self.token_manager.refresh_access_token(
+            json.refresh_token
+        )
+        if not token_pair:
             abort(http.HTTPStatus.UNAUTHORIZED)
 
+        access_token, refresh_token = token_pair
+        schema = schemas.RespLogon(
+            access_token=access_token, refresh_token=refresh_token
+        )
+        return schema, http.HTTPStatus.OK
+
+
+class UserIntrospectApi(MethodView):
+    """Batch Token Introspection"""
+
+    # ответ раскрывает пользователя и сессию токена
+    decorators = [login_required]
+
+    @role_required(
+        enums.UserRole.ADMIN,
+    )
+    @spec_tree.validate(
+        resp=Response("HTTP_400", "HTTP_401", HTTP_200=schemas.RespIntrospect),
+        tags=[TAG + "Tokens"],
+    )
+    def post(self, json: schemas.ReqIntrospect):
+        """Check many access and refresh tokens at once"""
+
+        schema = self.token_manager.introspect(
+            json.access_tokens,
+            json.refresh_tokens,
+        )
+
+        return schema, http.HTTPStatus.OK
+
 
 class UsersApi(MethodView):
     """Users Endpoint"""
@@ -206,6 +250,7 @@ class UsersApi(MethodView):
     @role_required(
         enums.UserRole.ADMIN,
     )
+    @use_replica
     @spec_tree.validate(
         resp=Response("HTTP_401", HTTP_200=schemas.ItemsUser),
         tags=[TAG + "Users"],
@@ -214,9 +259,11 @@ class UsersApi(MethodView):
         """Get Items User"""
 
         with self._uow:
-            rows, cnt = self._uow.users.find_by(query)
+            rows, cnt, next_cursor = self._uow.users.find_by(query)
 
-        schema = schemas.ItemsUser(items=rows, total=cnt)
+        schema = schemas.ItemsUser(
+            items=rows, total=cnt, next_cursor=next_cursor
+        )
 
         return schema, http.HTTPStatus.OK
 
@@ -237,7 +284,7 @@ class UserApi(MethodView):
         """Get User"""
 
         with self._uow:
-            row = self._uow.users.get(id)
+            row = self._uow.users.get_record(id)
 
         if not row:
             abort(
@@ -270,6 +317,7 @@ class UserApi(MethodView):
             row.full_name = json.full_name
 
             self._uow.users.add(row)
+            self._uow.users.invalidate(row.id)
             self._uow.commit()
 
         schema = schemas.RespMessage(
@@ -302,6 +350,7 @@ class UserApi(MethodView):
                 )
 
             self._uow.users.delete(row)
+            self._uow.users.invalidate(row.id)
             self._uow.commit()
 
         schema = schemas.RespMessage(
@@ -311,20 +360,56 @@ class UserApi(MethodView):
         return schema, http.HTTPStatus.OK
 
 
+def _history_user_id(query: schemas.ReqHistoryExport) -> uuid.UUID:
+    if query.user_id and (query.user_id != g.current_user.id and g.current_user.role != enums.UserRole.ADMIN):
+        abort(http.HTTPStatus.UNAUTHORIZED)
+    return query.user_id if query.user_id else g.current_user.id
+
+
 class UserHistoryApi(MethodView):
     decorators = [login_required]
 
+    @use_replica
     @spec_tree.validate(
         resp=Response("HTTP_401", "HTTP_404", HTTP_200=schemas.RespHistoryItems),
         tags=[TAG + "History"]
     )
     def get(self, query: schemas.ReqHistory):
-        if query.user_id and (query.user_id != g.current_user.id and g.current_user.role != enums.UserRole.ADMIN):
-            abort(http.HTTPStatus.UNAUTHORIZED)
-        user_id, before, after = query.user_id if query.user_id else g.current_user.id, query.before, query.after
+        user_id = _history_user_id(query)
         with self._uow:
-            rows = self._uow.login_history.fetch_by(user_id=user_id, before=before, after=after)
-        return schemas.RespHistoryItems(items=rows)
+            rows, next_cursor = self._uow.login_history.fetch_by(
+                user_id=user_id,
+                before=query.before,
+                after=query.after,
+                cursor=query.cursor,
+                limit=query.limit,
+            )
+        return schemas.RespHistoryItems(items=rows, next_cursor=next_cursor)
+
+
+class UserHistoryExportApi(MethodView):
+    """Login History NDJSON Export"""
+
+    decorators = [login_required]
+
+    @use_replica
+    @spec_tree.validate(tags=[TAG + "History"])
+    def get(self, query: schemas.ReqHistoryExport):
+        """Stream all logins, one JSON object per line"""
+
+        user_id = _history_user_id(query)
+
+        def generate():
+            with self._uow:
+                for row in self._uow.login_history.iter_by(
+                    user_id=user_id, before=query.before, after=query.after
+                ):
+                    yield schemas.RespHistory.from_orm(row).json() + "\n"
+
+        return current_app.response_class(
+            stream_with_context(generate()),
+            mimetype="application/x-ndjson",
+        )
 
 
 class UserPasswordEditApi(MethodView):
@@ -345,20 +430,21 @@ class UserPasswordEditApi(MethodView):
                     http.HTTPStatus.NOT_FOUND,
                 )
 
-            if not check_password_hash(row.password, json.password_old):
+            if not password_hasher.check(row.password, json.password_old):
                 abort(
                     http.HTTPStatus.UNAUTHORIZED,
                 )
 
-            if check_password_hash(row.password, json.password):
+            if password_hasher.check(row.password, json.password):
                 abort(
                     http.HTTPStatus.BAD_REQUEST,
                     E_PASSWORD_EQ_NEW_AND_OLD,
                 )
 
-            row.password = generate_password_hash(json.password)
+            row.password = password_hasher.generate(json.password)
             row.is_new = False
 
+            self._uow.users.invalidate(row.id)
             self._uow.commit()
 
         schema = schemas.RespMessage(
@@ -373,6 +459,7 @@ class UsersSessionsApi(MethodView):
 
     decorators = [login_required]
 
+    @use_replica
     @spec_tree.validate(
         resp=Response("HTTP_401", HTTP_200=schemas.ItemsSession),
         tags=[TAG + "Users"],
@@ -381,13 +468,40 @@ class UsersSessionsApi(MethodView):
         """Get User All Sessions"""
 
         with self._uow:
-            rows, cnt = self._uow.tokens.find_by(query)
+            rows, cnt, next_cursor = self._uow.tokens.find_by(query)
 
-        schema = schemas.ItemsSession(items=rows, total=cnt)
+        schema = schemas.ItemsSession(
+            items=rows, total=cnt, next_cursor=next_cursor
+        )
 
         return schema, http.HTTPStatus.OK
 
 
+class UsersSessionsRevokeApi(MethodView):
+    """Bulk Session Revocation Endpoint"""
+
+    decorators = [login_required]
+
+    @role_required(
+        enums.UserRole.ADMIN,
+    )
+    @spec_tree.validate(
+        resp=Response("HTTP_400", "HTTP_401", HTTP_200=schemas.RespRevoked),
+        tags=[TAG + "Manage"],
+    )
+    def post(self, json: schemas.ReqRevokeSessions):
+        """Revoke sessions by user, role, ids or creation date"""
+
+        count = self.token_manager.revoke_sessions(
+            user_id=json.user_id,
+            role=json.role,
+            session_ids=json.session_ids,
+            created_before=json.created_before,
+        )
+
+        return schemas.RespRevoked(count=count), http.HTTPStatus.OK
+
+
 class UserSessionsApi(MethodView):
     """User Sessions Endpoint"""
 
@@ -413,6 +527,8 @@ class UserSessionsApi(MethodView):
             self._uow.tokens.add(row)
             self._uow.commit()
 
+        revocation_list.add([id])
+
         schema = schemas.RespMessage(
             message=http.HTTPStatus.OK.phrase,
         )
@@ -450,6 +566,12 @@ bp.add_url_rule(
     methods=["POST"],
 )
 
+bp.add_url_rule(
+    "/introspect",
+    view_func=UserIntrospectApi.as_view("user-introspect"),
+    methods=["POST"],
+)
+
 bp.add_url_rule(
     "/users",
     view_func=UsersApi.as_view("users"),
@@ -474,6 +596,12 @@ bp.add_url_rule(
     methods=["GET"],
 )
 
+bp.add_url_rule(
+    "/sessions/revoke",
+    view_func=UsersSessionsRevokeApi.as_view("sessions_revoke"),
+    methods=["POST"],
+)
+
 bp.add_url_rule(
     "/sessions/<uuid:id>/deactivate",
     view_func=UserSessionsApi.as_view("session_deactivate"),
@@ -486,6 +614,11 @@ bp.add_url_rule(
     methods=["GET"]
 )
 
+bp.add_url_rule(
+    "/login_history/export",
+    view_func=UserHistoryExportApi.as_view("login_history_export"),
+)
+
 bp.add_url_rule(
     "/oauth",
     view_func=UserOAuthApi.as_view("oauth"),
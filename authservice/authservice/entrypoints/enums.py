@@ -30,6 +30,14 @@ class UserRole(StrEnum):
     USER = "user", "Пользователь"
 
 
+class UserSearch(StrEnum):
+    """User Search Mode"""
+
+    CONTAINS = "contains", "Вхождение подстроки"
+    PREFIX = "prefix", "Начало строки"
+    SIMILAR = "similar", "Похожие, по убыванию сходства"
+
+
 class ServiceProvider(enum.Enum):
     VK = "vk"
     YANDEX = "yandex"
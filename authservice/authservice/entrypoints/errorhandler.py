@@ -5,6 +5,7 @@ from flask import Flask, jsonify, request
 from loguru import logger
 from pydantic import ValidationError
 from sqlalchemy.exc import SQLAlchemyError, IntegrityError
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from werkzeug.exceptions import HTTPException
 
 from ..database import db
@@ -14,6 +15,7 @@ MSG_INTERNAL_ERROR = (
     "При обработке запроса произошла ошибка. Повторите попытку позже"
 )
 MSG_FORBIDDEN = "Отказано в доступе"
+MSG_POOL_TIMEOUT = "Сервис перегружен. Повторите попытку позже"
 MSG_SQLALCHEMY_ERROR = (
     "При работе с бд произошла ошибка! Повторите попытку позже."
 )
@@ -66,6 +68,34 @@ def init_errorhandler(app: Flask) -> None:
             e.code,
         )
 
+    @app.errorhandler(429)
+    @app.errorhandler(503)
+    def handle_retry_after(e: HTTPException):
+        logger.error(e)
+
+        headers = {k: v for k, v in e.get_headers() if k == "Retry-After"}
+        return (
+            jsonify(
+                message=e.description,
+            ),
+            e.code,
+            headers,
+        )
+
+    @app.errorhandler(PoolTimeoutError)
+    def handle_pool_timeout(e: PoolTimeoutError):
+        # все соединения пула заняты дольше DB_POOL_TIMEOUT
+        logger.error(e)
+
+        db.session.rollback()
+        return (
+            jsonify(
+                message=MSG_POOL_TIMEOUT,
+            ),
+            http.HTTPStatus.SERVICE_UNAVAILABLE,
+            {"Retry-After": "1"},
+        )
+
     @app.errorhandler(HTTPException)
     def handle_exception(e: HTTPException):
         logger.error(e)
@@ -16,6 +16,7 @@ from opentelemetry.instrumentation.flask import FlaskInstrumentor
 from .jaegerexporter import configure_tracer
 from ..config import cfg
 from ..database import db, migrate
+from ..database.pool import configure_pool, init_pool
 
 
 spec_tree = SpecTree(
@@ -60,7 +61,9 @@ def init_extensions(app: Flask) -> Flask:
     """Init Exceptions"""
 
     CORS(app)
+    configure_pool(app)
     db.init_app(app)
+    init_pool(app)
     migrate.init_app(app, db)
 
     # docs
@@ -77,7 +80,8 @@ def init_extensions(app: Flask) -> Flask:
 class Registry:
     """Register Class"""
 
-    _registry_: OrderedDict = OrderedDict()
+    def __init__(self):
+        self._registry_: OrderedDict = OrderedDict()
 
     def register(self, name: str):
         def wrap(entity):
@@ -89,3 +93,6 @@ class Registry:
 
     def items(self):
         return self._registry_.items()
+
+    def get(self, name: str):
+        return self._registry_.get(name)
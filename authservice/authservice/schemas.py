@@ -2,9 +2,15 @@ import datetime
 import uuid
 from typing import List
 
-from pydantic import BaseModel as PydanticBaseModel, validator, Field
+from pydantic import (
+    BaseModel as PydanticBaseModel,
+    validator,
+    root_validator,
+    Field,
+)
 
 from authservice.entrypoints import enums
+from authservice.utils.pagination import decode_cursor
 
 
 class BaseModel(PydanticBaseModel):
@@ -47,8 +53,9 @@ class ItemUser(BaseModelSchema):
 class ItemsUser(BaseModel):
     """List Item Schema of Users"""
 
-    total: int = 0
+    total: int | None = 0
     items: List[ItemUser]
+    next_cursor: str | None
 
 
 class RespAuth(ItemUser):
@@ -96,11 +103,23 @@ class ReqUserPasswordEdit(BaseModel):
         return v
 
 
+def _check_cursor(v: str | None) -> str | None:
+    if v is not None:
+        decode_cursor(v)
+    return v
+
+
 class ArgsPaginate(BaseModel):
     """Args Schema paginate"""
 
     offset: int = Field(0, ge=0, description="Номер сдвига")
     limit: int = Field(50, gt=0, description="Кол-во элементов")
+    cursor: str | None = Field(
+        None, description="Курсор следующей страницы, вместо offset"
+    )
+    with_total: bool = Field(True, description="Считать общее кол-во")
+
+    _cursor_valid = validator("cursor", allow_reuse=True)(_check_cursor)
 
 
 class ArgsUser(ArgsPaginate):
@@ -109,6 +128,10 @@ class ArgsUser(ArgsPaginate):
     full_name: str | None
     role: str | None
     login: str | None
+    q: str | None = Field(None, description="Поиск по ФИО и логину")
+    search: enums.UserSearch = Field(
+        enums.UserSearch.CONTAINS, description="Режим поиска"
+    )
 
 
 class ReqLogin(BaseModel):
@@ -133,6 +156,74 @@ class JWTPayload(BaseModelSchema):
     full_name: str | None
     role: str
     valid_through: datetime.datetime
+    sid: uuid.UUID | None = Field(None, description="Идентификатор сессии")
+
+
+class JWK(BaseModel):
+    """Public Key in JWK format"""
+
+    kty: str
+    crv: str
+    x: str
+    kid: str
+    alg: str
+    use: str
+
+
+class RespJWKS(BaseModel):
+    """JSON Web Key Set"""
+
+    keys: List[JWK]
+
+
+class ReqIntrospect(BaseModel):
+    """Req For Batch Token Introspection"""
+
+    access_tokens: List[str] = Field([], max_items=100)
+    refresh_tokens: List[uuid.UUID] = Field([], max_items=100)
+
+
+class ItemIntrospectAccess(BaseModel):
+    """Access Token Introspection Result"""
+
+    token: str
+    valid: bool
+    payload: JWTPayload | None
+
+
+class ItemIntrospectRefresh(BaseModel):
+    """Refresh Token Introspection Result"""
+
+    token: uuid.UUID
+    valid: bool
+    revoked: bool
+    user_id: uuid.UUID | None
+    expired_at: datetime.datetime | None
+
+
+class RespIntrospect(BaseModel):
+    access_tokens: List[ItemIntrospectAccess]
+    refresh_tokens: List[ItemIntrospectRefresh]
+
+
+class ReqRevokeSessions(BaseModel):
+    """Req For Bulk Session Revocation"""
+
+    user_id: uuid.UUID | None
+    role: enums.UserRole | None
+    session_ids: List[uuid.UUID] | None
+    created_before: datetime.datetime | None
+
+    @root_validator
+    def any_filter(cls, values):
+        if not any(v is not None for v in values.values()):
+            raise ValueError("At least one filter is required")
+
+        return values
+
+
+class RespRevoked(BaseModel):
+    count: int
 
 
 class ItemSession(BaseModelSchema):
@@ -146,8 +237,9 @@ class ItemSession(BaseModelSchema):
 class ItemsSession(BaseModel):
     """List of User Session Items"""
 
-    total: int = 0
+    total: int | None = 0
     items: List[ItemSession]
+    next_cursor: str | None
 
 
 class RespHistory(BaseModelSchema):
@@ -158,14 +250,22 @@ class RespHistory(BaseModelSchema):
 
 class RespHistoryItems(BaseModel):
     items: List[RespHistory]
+    next_cursor: str | None
 
 
-class ReqHistory(BaseModel):
+class ReqHistoryExport(BaseModel):
     user_id: uuid.UUID | None
     before: datetime.datetime | None
     after: datetime.datetime | None
 
 
+class ReqHistory(ReqHistoryExport):
+    limit: int = Field(50, gt=0, le=1000, description="Кол-во элементов")
+    cursor: str | None = Field(None, description="Курсор следующей страницы")
+
+    _cursor_valid = validator("cursor", allow_reuse=True)(_check_cursor)
+
+
 class ReqOAuth(BaseModel):
     code: str
     service_provider: enums.ServiceProvider
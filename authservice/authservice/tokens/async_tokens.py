@@ -0,0 +1,114 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from uuid import UUID, uuid4
+
+from loguru import logger
+
+from .. import schemas
+from ..config import cfg
+from ..unit_of_work import AsyncUnitOfWork
+from .revocation import RevocationList
+from .tokens import TokenManager
+
+
+class AsyncRevocationList(RevocationList):
+    """Revocation list of asyncio mode
+
+    Проверка токена не ждёт БД: список дочитывает фоновая задача
+    ``run`` раз в ``sync_interval`` секунд.
+    """
+
+    def _maybe_sync(self) -> None:
+        pass
+
+    async def sync_async(self) -> None:
+        """Fetch sessions revoked since the last sync"""
+
+        now = datetime.now(timezone.utc)
+        async with AsyncUnitOfWork() as uow:
+            rows = await uow.tokens.fetch_revoked(
+                updated_after=self.updated_after(now),
+            )
+        self.merge(rows, now)
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await self.sync_async()
+            except Exception as e:
+                # в т.ч. OSError asyncpg, пока БД недоступна
+                logger.error(f"Revocation list sync failed: {e}")
+            await asyncio.sleep(self.sync_interval)
+
+
+async_revocation_list = AsyncRevocationList(
+    window=timedelta(minutes=cfg.ACCESS_TOKEN_TTL),
+    sync_interval=cfg.REVOCATION_SYNC_INTERVAL,
+)
+
+
+class AsyncTokenManager:
+    """Token Manager of asyncio mode
+
+    Те же токены и сессии, что выдаёт ``TokenManager``, запросы
+    выполняются через ``AsyncUnitOfWork`` вызывающего кода.
+    """
+
+    # выпуск и разбор токенов не обращаются к БД, код общий
+    _issue_token_pair = TokenManager._issue_token_pair
+    _introspect = TokenManager._introspect
+    decode_access_token = TokenManager.decode_access_token
+    check_access_token = TokenManager.check_access_token
+
+    def __init__(self, uow: AsyncUnitOfWork):
+        self._uow = uow
+
+    async def get_token_pair(self, user_id: UUID) -> tuple[str, uuid4]:
+        user_row = await self._uow.users.get_record(user_id)
+        token_pair = self._issue_token_pair(user_row)
+        await self._uow.commit()
+        return token_pair
+
+    async def refresh_access_token(
+        self, refresh_token: UUID
+    ) -> Optional[tuple[str, uuid4]]:
+        session_row = await self._uow.tokens.consume(
+            token=refresh_token,
+            now=datetime.now(),
+        )
+        if not session_row:
+            await self._uow.rollback()
+            return None
+        user_row = await self._uow.users.get_record(session_row.user_id)
+        if user_row is None:
+            # пользователь удалён после выдачи токена
+            await self._uow.rollback()
+            return None
+        token_pair = self._issue_token_pair(user_row)
+        await self._uow.commit()
+        async_revocation_list.add([session_row.session_id])
+        return token_pair
+
+    async def invalidate_token(self, refresh_token: UUID) -> None:
+        token_row = await self._uow.tokens.get_by(token=refresh_token)
+        if not token_row:
+            return
+        token_row.expired_at = None
+        session_id = token_row.id
+        await self._uow.commit()
+        async_revocation_list.add([session_id])
+
+    @staticmethod
+    def _check_revoked(
+        token: schemas.JWTPayload,
+    ) -> Optional[schemas.JWTPayload]:
+        if token.sid and async_revocation_list.is_revoked(token.sid):
+            return None
+        return token
+
+    async def introspect(
+        self, access_tokens: list[str], refresh_tokens: list[UUID]
+    ) -> schemas.RespIntrospect:
+        rows = await self._uow.tokens.fetch_by_tokens(refresh_tokens)
+        return self._introspect(access_tokens, refresh_tokens, rows)
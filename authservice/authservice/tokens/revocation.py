@@ -0,0 +1,104 @@
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Iterable
+
+from loguru import logger
+from sqlalchemy.exc import SQLAlchemyError
+
+from ..unit_of_work import UnitOfWork
+
+# запас на транзакции, закоммиченные позже своего updated_at
+SYNC_OVERLAP = timedelta(seconds=60)
+
+
+class RevocationList:
+    """In-process list of revoked sessions
+
+    Access-токен с отозванной сессией может жить не дольше
+    ``window``, поэтому достаточно держать точное множество сессий,
+    отозванных за это окно. Множество дочитывается из БД по
+    ``sessions.updated_at`` не чаще раза в ``sync_interval`` секунд.
+    """
+
+    def __init__(self, window: timedelta, sync_interval: float):
+        self.window = window
+        self.sync_interval = sync_interval
+
+        self._uow = UnitOfWork()
+        self._lock = threading.Lock()
+        # add из потоков запросов и merge синхронизации меняют словарь
+        self._revoked_lock = threading.Lock()
+        self._revoked: dict[uuid.UUID, datetime] = {}
+        self._synced_at: datetime | None = None
+        self._next_sync = 0.0
+
+    def __len__(self) -> int:
+        return len(self._revoked)
+
+    def is_revoked(self, session_id: uuid.UUID) -> bool:
+        """Check session without query"""
+
+        self._maybe_sync()
+        return session_id in self._revoked
+
+    def add(self, session_ids: Iterable[uuid.UUID]) -> None:
+        """Mark sessions revoked by this worker immediately"""
+
+        now = datetime.now(timezone.utc)
+        with self._revoked_lock:
+            for session_id in session_ids:
+                self._revoked[session_id] = now
+
+    def _maybe_sync(self) -> None:
+        if time.monotonic() < self._next_sync:
+            return
+        if not self._lock.acquire(blocking=False):
+            # синхронизирует другой поток
+            return
+        try:
+            self._next_sync = time.monotonic() + self.sync_interval
+            self.sync()
+        except SQLAlchemyError as e:
+            logger.error(f"Revocation list sync failed: {e}")
+        finally:
+            self._lock.release()
+
+    def sync(self) -> None:
+        """Fetch sessions revoked since the last sync"""
+
+        now = datetime.now(timezone.utc)
+
+        with self._uow:
+            rows = self._uow.tokens.fetch_revoked(
+                updated_after=self.updated_after(now),
+            )
+
+        self.merge(rows, now)
+
+    def updated_after(self, now: datetime) -> datetime:
+        """Fetch sessions revoked after this moment"""
+
+        return (self._synced_at or now - self.window) - SYNC_OVERLAP
+
+    def merge(
+        self, rows: Iterable[tuple[uuid.UUID, datetime]], now: datetime
+    ) -> None:
+        """Add fetched sessions and drop ones older than window"""
+
+        since = self._synced_at or now - self.window
+        # токены старше окна уже истекли сами
+        min_revoked_at = now - self.window - SYNC_OVERLAP
+        with self._revoked_lock:
+            for session_id, updated_at in rows:
+                self._revoked[session_id] = updated_at
+                if updated_at > since:
+                    since = updated_at
+            self._synced_at = since
+
+            expired = [
+                k for k, v in self._revoked.items() if v < min_revoked_at
+            ]
+            for k in expired:
+                del self._revoked[k]
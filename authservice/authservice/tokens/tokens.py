@@ -8,13 +8,38 @@ from pydantic import ValidationError
 
 from .. import schemas
 from ..database import models
-from ..unit_of_work import UnitOfWork
-from ..utils.jwt_utils import get_jwt_token, decode_jwt_token, check_jwt_token
+from ..unit_of_work import UnitOfWork, current_uow
+from ..utils.cache import TTLCache
+from ..utils.jwt_utils import keyring
+from ..utils.metrics import metrics
 from ..config import cfg
+from .revocation import RevocationList
+
+# signature -> (token, payload, keyring generation)
+access_token_cache = TTLCache(cfg.ACCESS_TOKEN_CACHE_SIZE)
+metrics.gauge(
+    "access_token_cache_hits",
+    "Access token cache hits",
+    lambda: access_token_cache.hits,
+    kind="counter",
+)
+metrics.gauge(
+    "access_token_cache_misses",
+    "Access token cache misses",
+    lambda: access_token_cache.misses,
+    kind="counter",
+)
+revocation_list = RevocationList(
+    window=timedelta(minutes=cfg.ACCESS_TOKEN_TTL),
+    sync_interval=cfg.REVOCATION_SYNC_INTERVAL,
+)
 
 
 class AbstractTokenManager:
-    _uow: UnitOfWork = UnitOfWork()
+    @property
+    def _uow(self) -> UnitOfWork:
+        # в запросе - транзакция вызывающего кода
+        return current_uow()
 
     @abc.abstractmethod
     def get_token_pair(self, user_id: uuid.UUID) -> tuple[uuid4, str]:
@@ -33,7 +58,18 @@ class AbstractTokenManager:
         pass
 
     @abc.abstractmethod
-    def invalidate_all_tokens(self, user_id: UUID):
+    def invalidate_all_tokens(self, user_id: UUID) -> int:
+        pass
+
+    @abc.abstractmethod
+    def revoke_sessions(
+        self,
+        *,
+        user_id: UUID = None,
+        role: str = None,
+        session_ids: list[UUID] = None,
+        created_before: datetime = None,
+    ) -> int:
         pass
 
     @abc.abstractmethod
@@ -46,34 +82,46 @@ class AbstractTokenManager:
     def check_access_token(self, access_token: str) -> bool:
         pass
 
+    @abc.abstractmethod
+    def introspect(
+        self, access_tokens: list[str], refresh_tokens: list[UUID]
+    ) -> schemas.RespIntrospect:
+        pass
+
 
 class TokenManager(AbstractTokenManager):
     def get_token_pair(self, user_id: uuid.UUID) -> tuple[str, uuid4]:
         with self._uow:
-            user_row = self._uow.users.get(user_id)
+            user_row = self._uow.users.get_record(user_id)
+            token_pair = self._issue_token_pair(user_row)
+            self._uow.commit()
+        return token_pair
+
+    def _issue_token_pair(self, user_row) -> tuple[str, uuid4]:
+        """Build access token and add session, commit is on caller"""
+
         access_token_expiry_date = datetime.now() + timedelta(
             minutes=cfg.ACCESS_TOKEN_TTL
         )
         refresh_token_expiry_date = datetime.now() + timedelta(
             minutes=cfg.REFRESH_TOKEN_TTL
         )
+        row = models.Session(id=uuid4(), user_id=user_row.id)
         jwt_payload = schemas.JWTPayload(
-            id=user_id,
+            id=user_row.id,
+            sid=row.id,
             role=user_row.role,
             valid_through=access_token_expiry_date,
             full_name=user_row.full_name,
             login=user_row.login,
         )
 
-        access_token = get_jwt_token(jwt_payload.json())
+        access_token = keyring.encode(jwt_payload.json())
         refresh_token = uuid4()
 
-        with self._uow:
-            row = models.Session(user_id=user_id)
-            row.token = refresh_token
-            row.expired_at = refresh_token_expiry_date
-            self._uow.tokens.add(row)
-            self._uow.commit()
+        row.token = refresh_token
+        row.expired_at = refresh_token_expiry_date
+        self._uow.tokens.add(row)
         return access_token, refresh_token
 
     def check_refresh_token(self, token: UUID) -> bool:
@@ -88,14 +136,25 @@ class TokenManager(AbstractTokenManager):
     def refresh_access_token(
         self, refresh_token: UUID
     ) -> Optional[tuple[str, uuid4]]:
-        if not self.check_refresh_token(refresh_token):
-            return None
         with self._uow:
-            token_row = self._uow.tokens.get_by(token=refresh_token)
-            user_row = self._uow.users.get(token_row.user_id)
-            token_row.expired_at = None
+            # UPDATE ... RETURNING блокирует строку сессии, поэтому при
+            # одновременных запросах токен сможет обменять только один
+            session_row = self._uow.tokens.consume(
+                token=refresh_token,
+                now=datetime.now(),
+            )
+            if not session_row:
+                self._uow.rollback()
+                return None
+            user_row = self._uow.users.get_record(session_row.user_id)
+            if user_row is None:
+                # пользователь удалён после выдачи токена
+                self._uow.rollback()
+                return None
+            token_pair = self._issue_token_pair(user_row)
             self._uow.commit()
-        return self.get_token_pair(user_row.id)
+        revocation_list.add([session_row.session_id])
+        return token_pair
 
     def invalidate_token(self, refresh_token: UUID) -> None:
         with self._uow:
@@ -103,34 +162,117 @@ class TokenManager(AbstractTokenManager):
             if not token_row:
                 return
             token_row.expired_at = None
+            session_id = token_row.id
             self._uow.commit()
+        revocation_list.add([session_id])
+
+    def invalidate_all_tokens(self, user_id: UUID) -> int:
+        return self.revoke_sessions(user_id=user_id)
 
-    def invalidate_all_tokens(self, user_id: UUID) -> None:
+    def revoke_sessions(
+        self,
+        *,
+        user_id: UUID = None,
+        role: str = None,
+        session_ids: list[UUID] = None,
+        created_before: datetime = None,
+    ) -> int:
         with self._uow:
-            user_tokens = self._uow.tokens.fetch_by(
+            revoked = self._uow.tokens.revoke(
+                now=datetime.now(),
                 user_id=user_id,
-                max_expired_at=datetime.now(),
+                role=role,
+                session_ids=session_ids,
+                created_before=created_before,
             )
-            if not user_tokens:
-                return
-            with self._uow:
-                for t in user_tokens:
-                    t.expired_at = None
-                    self._uow.tokens.add(t)
-                self._uow.commit()
+            self._uow.commit()
+        revocation_list.add(revoked)
+        return len(revoked)
 
     def decode_access_token(
         self, access_token: str
     ) -> Optional[schemas.JWTPayload]:
+        signature = access_token.rpartition(".")[2]
+        cached = access_token_cache.get(signature)
+        if (
+            cached is not None
+            and cached[0] == access_token
+            and cached[2] == keyring.generation
+        ):
+            return self._check_revoked(cached[1])
+
+        payload = keyring.decode(access_token)
+        if payload is None:
+            return None
         try:
-            token = schemas.JWTPayload.parse_raw(
-                decode_jwt_token(access_token)
-            )
+            token = schemas.JWTPayload.parse_raw(payload)
         except ValidationError:
             return None
         if token.valid_through < datetime.now():
             return None
+
+        access_token_cache.set(
+            signature,
+            (access_token, token, keyring.generation),
+            token.valid_through.timestamp(),
+        )
+        return self._check_revoked(token)
+
+    @staticmethod
+    def _check_revoked(
+        token: schemas.JWTPayload,
+    ) -> Optional[schemas.JWTPayload]:
+        if token.sid and revocation_list.is_revoked(token.sid):
+            return None
         return token
 
     def check_access_token(self, access_token: str) -> bool:
-        return check_jwt_token(access_token)
+        return keyring.verify(access_token)
+
+    def introspect(
+        self, access_tokens: list[str], refresh_tokens: list[UUID]
+    ) -> schemas.RespIntrospect:
+        with self._uow:
+            rows = self._uow.tokens.fetch_by_tokens(refresh_tokens)
+
+        return self._introspect(access_tokens, refresh_tokens, rows)
+
+    def _introspect(
+        self,
+        access_tokens: list[str],
+        refresh_tokens: list[UUID],
+        rows: list[models.Session],
+    ) -> schemas.RespIntrospect:
+        access_items = []
+        for token in access_tokens:
+            payload = self.decode_access_token(token)
+            access_items.append(
+                schemas.ItemIntrospectAccess(
+                    token=token,
+                    valid=payload is not None,
+                    payload=payload,
+                )
+            )
+
+        rows = {row.token: row for row in rows}
+
+        now = datetime.now()
+        refresh_items = []
+        for token in refresh_tokens:
+            row = rows.get(str(token))
+            is_active = bool(row and row.expired_at and row.expired_at > now)
+            refresh_items.append(
+                schemas.ItemIntrospectRefresh(
+                    token=token,
+                    valid=is_active,
+                    # отозванная сессия: expired_at = None
+                    revoked=bool(row and row.expired_at is None),
+                    user_id=row.user_id if row else None,
+                    expired_at=row.expired_at if row else None,
+                )
+            )
+
+        return schemas.RespIntrospect(
+            access_tokens=access_items,
+            refresh_tokens=refresh_items,
+        )
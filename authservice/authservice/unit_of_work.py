@@ -1,17 +1,38 @@
+from flask import g, has_request_context
+
+from .database.aio import async_db
+from .database.async_repositories import reg_async_repo
 from .database.repositories import reg_repo
+from .database.routing import route_reads
 from .entrypoints.extensions import db
 
 
 class UnitOfWork:
-    """Unit Of Work"""
+    """Unit Of Work
 
-    def __init__(self):
+    Репозитории создаются при первом обращении к ним. В запросе
+    используется одна UoW (``current_uow``): ``commit`` только
+    сбрасывает изменения в БД, транзакция фиксируется один раз
+    в конце обработки запроса (``complete``).
+    """
+
+    def __init__(self, deferred: bool = False):
         self._session = db.session
+        self._deferred = deferred
+        self._pending = False
+
+    def __getattr__(self, name):
+        # вызывается только если атрибут ещё не создан
+        klass_ = reg_repo.get(name)
+        if name.startswith("_") or klass_ is None:
+            raise AttributeError(name)
+
+        repo = klass_(self._session)
+        setattr(self, name, repo)
+        return repo
 
     def __enter__(self):
         """__enter__"""
-        for attr, klass_ in reg_repo.items():
-            setattr(self, attr, klass_(self._session))
 
         return self
 
@@ -22,10 +43,77 @@ class UnitOfWork:
             self.rollback()
 
     def commit(self):
+        if self._deferred:
+            self._session.flush()
+            self._pending = True
+        else:
+            self._session.commit()
+
+    def complete(self) -> bool:
+        """Commit request transaction if something was committed"""
+
+        if not self._pending:
+            return False
         self._session.commit()
+        self._pending = False
+        return True
+
+    def use_replica(self) -> None:
+        """Route reads to replica until the first write"""
+
+        route_reads(self._session)
 
     def rollback(self):
         self._session.rollback()
+        self._pending = False
 
     def flush(self):
         self._session.flush()
+
+
+def current_uow() -> UnitOfWork:
+    """Request-scoped UoW, standalone one outside of request"""
+
+    if not has_request_context():
+        return UnitOfWork()
+
+    if "uow" not in g:
+        g.uow = UnitOfWork(deferred=True)
+    return g.uow
+
+
+class AsyncUnitOfWork:
+    """Unit Of Work of asyncio mode
+
+    Своя сессия ``AsyncSession`` на каждый ``async with``, соединение
+    возвращается в пул при выходе из блока. ``committed`` - была ли
+    зафиксирована запись.
+    """
+
+    def __init__(self):
+        self._session = async_db.session()
+        self.committed = False
+
+    def __getattr__(self, name):
+        klass_ = reg_async_repo.get(name)
+        if name.startswith("_") or klass_ is None:
+            raise AttributeError(name)
+
+        repo = klass_(self._session)
+        setattr(self, name, repo)
+        return repo
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exn_type, exn_value, traceback):
+        if exn_type:
+            await self.rollback()
+        await self._session.close()
+
+    async def commit(self):
+        await self._session.commit()
+        self.committed = True
+
+    async def rollback(self):
+        await self._session.rollback()
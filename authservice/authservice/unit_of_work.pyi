@@ -1,9 +1,13 @@
 import sqlalchemy.orm as so
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from .database import async_repositories as async_repo
 from .database import repositories as repo
 
 class UnitOfWork:
     _session: so.scoped_session
+    _deferred: bool
+    _pending: bool
 
     # repositories
     users: repo.UserRepository
@@ -11,9 +15,28 @@ class UnitOfWork:
     login_history: repo.HistoryRepository
     oauth_users: repo.OAuthAccountsRepository
 
-    def __init__(self): ...
+    def __init__(self, deferred: bool = False): ...
     def __enter__(self) -> UnitOfWork: ...
     def __exit__(self) -> None: ...
     def commit(self) -> None: ...
+    def complete(self) -> bool: ...
+    def use_replica(self) -> None: ...
     def flush(self) -> None: ...
     def rollback(self) -> None: ...
+
+def current_uow() -> UnitOfWork: ...
+
+class AsyncUnitOfWork:
+    _session: AsyncSession
+    committed: bool
+
+    # repositories
+    users: async_repo.AsyncUserRepository
+    tokens: async_repo.AsyncTokenRepository
+    login_history: async_repo.AsyncHistoryRepository
+
+    def __init__(self): ...
+    async def __aenter__(self) -> AsyncUnitOfWork: ...
+    async def __aexit__(self, *args) -> None: ...
+    async def commit(self) -> None: ...
+    async def rollback(self) -> None: ...
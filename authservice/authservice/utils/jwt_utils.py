@@ -1,42 +1,436 @@
+import abc
 import base64
+import binascii
 import hashlib
 import hmac
 import json
+import os
+import threading
+import time
 from typing import Optional
 
-from ..config import cfg
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric.ed25519 import (
+    Ed25519PrivateKey,
+    Ed25519PublicKey,
+)
+from loguru import logger
 
-secret = cfg.JWT_SECRET
+from ..config import cfg
 
 
-def get_jwt_token(payload: str) -> str:
-    header = {"alg": "HS256", "typ": "JWT"}
-    header_b64_str = base64.urlsafe_b64encode(
-        json.dumps(header).encode()
-    ).decode()
-    payload_b64_str = base64.urlsafe_b64encode(payload.encode()).decode()
+def b64encode(data: bytes) -> bytes:
+    """base64url without padding (RFC 7515)"""
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
 
-    body = f"{header_b64_str}.{payload_b64_str}"
-    signature = hmac.new(
-        secret.encode(), body.encode(), hashlib.sha256
-    ).hexdigest()
-    return f"{header_b64_str}.{payload_b64_str}.{signature}"
 
+def b64decode(data: bytes) -> bytes:
+    """base64url, padding is optional"""
+    return base64.urlsafe_b64decode(data + b"=" * (-len(data) % 4))
 
-def decode_jwt_token(token: str) -> Optional[str]:
-    if check_jwt_token(token):
-        return base64.urlsafe_b64decode(token.split(".")[1]).decode("utf-8")
-    return None
 
+def split_token(token: str) -> Optional[tuple[bytes, bytes, bytes, bytes]]:
+    """Split token to (header, header.payload, payload, signature)"""
 
-def check_jwt_token(token: str) -> bool:
     try:
-        _, body, signature = token.split(".")
-        body_str = base64.urlsafe_b64decode(body).decode("utf-8")
-    except ValueError:
+        raw = token.encode()
+    except UnicodeError:
         # todo log error
-        return False
-    t = get_jwt_token(body_str)
-    if t.split(".")[-1] == signature:
+        return None
+
+    body, _, signature = raw.rpartition(b".")
+    header, _, payload = body.partition(b".")
+    if not payload or not signature:
+        return None
+    return header, body, payload, signature
+
+
+class BaseJWTCodec(abc.ABC):
+    """Base JWT Codec
+
+    Заголовок кодируется один раз при создании кодека.
+    """
+
+    alg: str = None
+
+    def __init__(self, kid: Optional[str] = None):
+        self.kid = kid
+        self.can_sign = True
+
+        header = {"alg": self.alg, "typ": "JWT"}
+        if kid:
+            header["kid"] = kid
+        self._header = self._encode_segment(json.dumps(header).encode())
+
+    @abc.abstractmethod
+    def _sign(self, body: bytes) -> bytes:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def _verify(self, body: bytes, signature: bytes) -> bool:
+        raise NotImplementedError
+
+    def _encode_segment(self, data: bytes) -> bytes:
+        return b64encode(data)
+
+    def _encode_signature(self, signature: bytes) -> str:
+        return b64encode(signature).decode()
+
+    def _decode_signature(self, signature: bytes) -> bytes:
+        return b64decode(signature)
+
+    def encode(self, payload: str) -> str:
+        """Sign payload and build token"""
+
+        body = self._header + b"." + self._encode_segment(payload.encode())
+        signature = self._encode_signature(self._sign(body))
+        return f"{body.decode()}.{signature}"
+
+    def decode(self, token: str) -> Optional[str]:
+        """Verify token and return payload, None if token is invalid"""
+
+        parts = split_token(token)
+        if parts is None:
+            return None
+        return self.decode_parts(*parts[1:])
+
+    def decode_parts(
+        self, body: bytes, payload: bytes, signature: bytes
+    ) -> Optional[str]:
+        """Verify already split token"""
+
+        try:
+            signature = self._decode_signature(signature)
+        except (ValueError, UnicodeError):
+            return None
+
+        if not self._verify(body, signature):
+            return None
+
+        try:
+            return b64decode(payload).decode("utf-8")
+        except (binascii.Error, UnicodeDecodeError):
+            return None
+
+    def verify(self, token: str) -> bool:
+        """Check token signature"""
+
+        return self.decode(token) is not None
+
+    @property
+    def header(self) -> bytes:
+        """Encoded header segment"""
+        return self._header
+
+    def jwk(self) -> Optional[dict]:
+        """Public key in JWK format, None for symmetric keys"""
+
+        return None
+
+
+class JWTCodec(BaseJWTCodec):
+    """HS256 JWT Codec
+
+    Ключ HMAC хранится в уже инициализированном состоянии и копируется
+    на каждую подпись. Формат токена (base64 с padding, подпись в hex)
+    совместим с ранее выданными токенами.
+    """
+
+    alg = "HS256"
+
+    def __init__(self, key: str, kid: Optional[str] = None):
+        self._hmac = hmac.new(key.encode(), digestmod=hashlib.sha256)
+        super().__init__(kid)
+
+    def _encode_segment(self, data: bytes) -> bytes:
+        return base64.urlsafe_b64encode(data)
+
+    def _encode_signature(self, signature: bytes) -> str:
+        return signature.hex()
+
+    def _decode_signature(self, signature: bytes) -> bytes:
+        return bytes.fromhex(signature.decode())
+
+    def _sign(self, body: bytes) -> bytes:
+        h = self._hmac.copy()
+        h.update(body)
+        return h.digest()
+
+    def _verify(self, body: bytes, signature: bytes) -> bool:
+        return hmac.compare_digest(self._sign(body), signature)
+
+
+class Ed25519JWTCodec(BaseJWTCodec):
+    """EdDSA (Ed25519) JWT Codec
+
+    Токены проверяются другими сервисами локально по публичному ключу
+    из JWKS. Без приватного ключа кодек умеет только проверять подпись.
+    """
+
+    alg = "EdDSA"
+
+    def __init__(
+        self,
+        public_key: Ed25519PublicKey,
+        private_key: Optional[Ed25519PrivateKey] = None,
+        kid: Optional[str] = None,
+    ):
+        self._public_key = public_key
+        self._private_key = private_key
+        self._x = b64encode(
+            public_key.public_bytes(
+                serialization.Encoding.Raw,
+                serialization.PublicFormat.Raw,
+            )
+        ).decode()
+        super().__init__(kid or self.thumbprint())
+        self.can_sign = private_key is not None
+
+    @classmethod
+    def from_pem(
+        cls, data: bytes, kid: Optional[str] = None
+    ) -> "Ed25519JWTCodec":
+        private_key = serialization.load_pem_private_key(data, password=None)
+        if not isinstance(private_key, Ed25519PrivateKey):
+            raise ValueError("Ed25519 private key is expected")
+
+        return cls(private_key.public_key(), private_key, kid)
+
+    @classmethod
+    def from_public_pem(
+        cls, data: bytes, kid: Optional[str] = None
+    ) -> "Ed25519JWTCodec":
+        public_key = serialization.load_pem_public_key(data)
+        if not isinstance(public_key, Ed25519PublicKey):
+            raise ValueError("Ed25519 public key is expected")
+
+        return cls(public_key, kid=kid)
+
+    def thumbprint(self) -> str:
+        """JWK Thumbprint (RFC 7638)"""
+
+        canonical = json.dumps(
+            {"crv": "Ed25519", "kty": "OKP", "x": self._x},
+            separators=(",", ":"),
+            sort_keys=True,
+        )
+        return b64encode(hashlib.sha256(canonical.encode()).digest()).decode()
+
+    def _sign(self, body: bytes) -> bytes:
+        if self._private_key is None:
+            raise RuntimeError("Private key is not loaded")
+        return self._private_key.sign(body)
+
+    def _verify(self, body: bytes, signature: bytes) -> bool:
+        try:
+            self._public_key.verify(signature, body)
+        except InvalidSignature:
+            return False
         return True
-    return False
+
+    def jwk(self) -> Optional[dict]:
+        return dict(
+            kty="OKP",
+            crv="Ed25519",
+            x=self._x,
+            kid=self.kid,
+            alg=self.alg,
+            use="sig",
+        )
+
+
+class Keyring:
+    """Signing Keyring
+
+    Один активный ключ подписи и набор ключей проверки, ключ выбирается
+    по ``kid`` из заголовка токена. Если задан ``path``, файл ключей
+    перечитывается не чаще раза в ``reload_interval`` секунд при
+    изменении mtime, поэтому ротация не требует рестарта воркеров.
+
+    Формат файла::
+
+        {
+            "active": "2024-02",
+            "keys": [
+                {"kid": "2024-02", "alg": "HS256", "secret": "..."},
+                {"kid": "2024-01", "alg": "HS256", "secret": "..."},
+                {"kid": "ed-1", "alg": "EdDSA", "private_key_file": "..."},
+                {"alg": "HS256", "secret": "..."}
+            ]
+        }
+
+    Ключ без ``kid`` проверяет токены, выпущенные до появления kid.
+    """
+
+    def __init__(
+        self,
+        codecs: list[BaseJWTCodec] = None,
+        active: Optional[str] = None,
+        path: Optional[str] = None,
+        reload_interval: float = 30,
+    ):
+        self.path = path
+        self.reload_interval = reload_interval
+        self.generation = 0
+
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._next_check = 0.0
+        self._active: BaseJWTCodec = None
+        self._by_kid: dict[Optional[str], BaseJWTCodec] = {}
+        self._by_header: dict[bytes, BaseJWTCodec] = {}
+
+        if codecs:
+            self.set_keys(codecs, active)
+        if path:
+            self.reload()
+
+    @property
+    def active(self) -> BaseJWTCodec:
+        self._maybe_reload()
+        return self._active
+
+    def set_keys(
+        self, codecs: list[BaseJWTCodec], active: Optional[str] = None
+    ) -> None:
+        """Replace keys, active key is selected by kid"""
+
+        by_kid = {c.kid: c for c in codecs}
+        if active not in by_kid:
+            raise ValueError(f"Unknown active key: {active}")
+        if not by_kid[active].can_sign:
+            raise ValueError(f"Active key can not sign: {active}")
+
+        # состояние подменяется целиком, читатели видят либо старые,
+        # либо новые ключи
+        self._by_kid = by_kid
+        self._by_header = {c.header: c for c in codecs}
+        self._active = by_kid[active]
+        self.generation += 1
+
+    def reload(self) -> bool:
+        """Reload keys from file if it was changed"""
+
+        with self._lock:
+            self._next_check = time.monotonic() + self.reload_interval
+            mtime = os.stat(self.path).st_mtime_ns
+            if mtime == self._mtime:
+                return False
+
+            with open(self.path) as f:
+                data = json.load(f)
+            self.set_keys(
+                [load_codec(**key) for key in data["keys"]],
+                data.get("active"),
+            )
+            self._mtime = mtime
+            return True
+
+    def _maybe_reload(self) -> None:
+        if not self.path or time.monotonic() < self._next_check:
+            return
+        try:
+            self.reload()
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            # оставляем предыдущие ключи
+            logger.error(f"Keyring reload failed: {e}")
+
+    def get(self, kid: Optional[str]) -> Optional[BaseJWTCodec]:
+        self._maybe_reload()
+        return self._by_kid.get(kid)
+
+    def encode(self, payload: str) -> str:
+        """Sign payload by active key"""
+
+        return self.active.encode(payload)
+
+    def decode(self, token: str) -> Optional[str]:
+        """Verify token by key from its header"""
+
+        self._maybe_reload()
+
+        parts = split_token(token)
+        if parts is None:
+            return None
+
+        header = parts[0]
+        codec = self._by_header.get(header)
+        if codec is None:
+            try:
+                kid = json.loads(b64decode(header)).get("kid")
+            except (ValueError, AttributeError):
+                return None
+            codec = self._by_kid.get(kid)
+            if codec is None:
+                return None
+
+        return codec.decode_parts(*parts[1:])
+
+    def verify(self, token: str) -> bool:
+        return self.decode(token) is not None
+
+    def jwks(self) -> list[dict]:
+        """Public keys of all asymmetric keys"""
+
+        self._maybe_reload()
+        return [jwk for c in self._by_kid.values() if (jwk := c.jwk())]
+
+
+def load_codec(
+    alg: str = JWTCodec.alg,
+    kid: Optional[str] = None,
+    secret: Optional[str] = None,
+    private_key_file: Optional[str] = None,
+    public_key_file: Optional[str] = None,
+) -> BaseJWTCodec:
+    """Codec by key description"""
+
+    if alg == JWTCodec.alg:
+        if not secret:
+            raise ValueError(f"Secret is required for key: {kid}")
+        return JWTCodec(secret, kid=kid)
+
+    if alg == Ed25519JWTCodec.alg:
+        if not (private_key_file or public_key_file):
+            raise ValueError(f"Key file is required for key: {kid}")
+        if private_key_file:
+            with open(private_key_file, "rb") as f:
+                return Ed25519JWTCodec.from_pem(f.read(), kid=kid)
+        with open(public_key_file, "rb") as f:
+            return Ed25519JWTCodec.from_public_pem(f.read(), kid=kid)
+
+    raise ValueError(f"Unsupported algorithm: {alg}")
+
+
+def build_keyring() -> Keyring:
+    """Keyring by settings"""
+
+    if cfg.JWT_KEYS_FILE:
+        return Keyring(
+            path=cfg.JWT_KEYS_FILE,
+            reload_interval=cfg.JWT_KEYS_RELOAD_INTERVAL,
+        )
+
+    codec = load_codec(
+        alg=cfg.JWT_ALGORITHM,
+        kid=cfg.JWT_KEY_ID,
+        secret=cfg.JWT_SECRET,
+        private_key_file=cfg.JWT_PRIVATE_KEY_FILE,
+    )
+    return Keyring([codec], codec.kid)
+
+
+keyring = build_keyring()
+
+
+def get_jwt_token(payload: str) -> str:
+    return keyring.encode(payload)
+
+
+def decode_jwt_token(token: str) -> Optional[str]:
+    return keyring.decode(token)
+
+
+def check_jwt_token(token: str) -> bool:
+    return keyring.verify(token)
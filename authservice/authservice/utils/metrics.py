@@ -0,0 +1,46 @@
+import threading
+from collections import OrderedDict
+from typing import Callable
+
+
+class MetricsRegistry:
+    """Metrics read on scrape
+
+    Значение метрики вычисляется функцией в момент запроса ``/metrics``,
+    отдаётся в текстовом формате Prometheus.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._gauges: OrderedDict[
+            str, tuple[str, Callable[[], float], str]
+        ] = OrderedDict()
+
+    def gauge(
+        self,
+        name: str,
+        description: str,
+        fn: Callable[[], float],
+        kind: str = "gauge",
+    ):
+        """Register metric, ``kind`` is gauge or counter"""
+
+        with self._lock:
+            self._gauges[name] = (description, fn, kind)
+
+    def collect(self) -> dict[str, float]:
+        with self._lock:
+            gauges = list(self._gauges.items())
+        return {name: float(fn()) for name, (_, fn, _) in gauges}
+
+    def render(self) -> str:
+        lines = []
+        values = self.collect()
+        for name, (description, _, kind) in self._gauges.items():
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.append(f"{name} {values[name]}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
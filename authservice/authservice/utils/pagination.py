@@ -0,0 +1,23 @@
+import base64
+import binascii
+import datetime
+import json
+import uuid
+
+
+def encode_cursor(created_at: datetime.datetime, id_: uuid.UUID) -> str:
+    """Opaque cursor of the last row on a page"""
+
+    raw = json.dumps([created_at.isoformat(), str(id_)]).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str) -> tuple[datetime.datetime, uuid.UUID]:
+    """Position from cursor, ValueError if cursor is malformed"""
+
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, id_ = json.loads(raw)
+        return datetime.datetime.fromisoformat(created_at), uuid.UUID(id_)
+    except (binascii.Error, TypeError, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
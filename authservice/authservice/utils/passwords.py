@@ -0,0 +1,187 @@
+import atexit
+import hashlib
+import hmac
+import multiprocessing
+import os
+import secrets
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from werkzeug import security
+from werkzeug.exceptions import ServiceUnavailable
+
+from ..config import cfg
+
+MSG_HASHING_BUSY = "Сервис перегружен. Повторите попытку позже"
+
+# стоимость по умолчанию: число итераций PBKDF2 и параметр N для scrypt
+DEFAULT_COST = {
+    "pbkdf2:sha256": security.DEFAULT_PBKDF2_ITERATIONS,
+    "pbkdf2:sha512": security.DEFAULT_PBKDF2_ITERATIONS,
+    "scrypt": 2**15,
+}
+SCRYPT_R = 8
+SCRYPT_P = 1
+SALT_LENGTH = 16
+
+
+def hash_method(algorithm: str, cost: int | None = None) -> str:
+    """Method string with parameters, e.g. ``pbkdf2:sha256:600000``"""
+
+    if algorithm not in DEFAULT_COST:
+        raise ValueError(f"Unsupported algorithm: {algorithm}")
+
+    cost = cost or DEFAULT_COST[algorithm]
+    if algorithm == "scrypt":
+        if cost & (cost - 1):
+            raise ValueError("scrypt cost must be a power of two")
+        return f"scrypt:{cost}:{SCRYPT_R}:{SCRYPT_P}"
+    return f"{algorithm}:{cost}"
+
+
+def _scrypt(password: str, salt: str, method: str) -> str:
+    n, r, p = (int(x) for x in method.split(":")[1:])
+    return hashlib.scrypt(
+        password.encode(),
+        salt=salt.encode(),
+        n=n,
+        r=r,
+        p=p,
+        maxmem=256 * n * r * p,
+    ).hex()
+
+
+def generate_password_hash(password: str, method: str) -> str:
+    """Hash password in werkzeug format ``method$salt$hash``"""
+
+    if not method.startswith("scrypt:"):
+        return security.generate_password_hash(
+            password, method=method, salt_length=SALT_LENGTH
+        )
+
+    # werkzeug 2.2 не умеет scrypt, формат совпадает с werkzeug>=2.3
+    salt = security.gen_salt(SALT_LENGTH)
+    return f"{method}${salt}${_scrypt(password, salt, method)}"
+
+
+def check_password_hash(pwhash: str, password: str) -> bool:
+    """Check password against hash of any supported method"""
+
+    if not pwhash.startswith("scrypt:"):
+        return security.check_password_hash(pwhash, password)
+
+    try:
+        method, salt, hashval = pwhash.split("$", 2)
+        actual = _scrypt(password, salt, method)
+    except ValueError:
+        return False
+    return hmac.compare_digest(actual, hashval)
+
+
+class HashingQueueFull(ServiceUnavailable):
+    """Too many password hashes in flight"""
+
+    description = MSG_HASHING_BUSY
+
+
+class PasswordHasher:
+    """Password Hashing Service
+
+    Хэширование выполняется в пуле процессов, число одновременно
+    принятых задач ограничено ``queue_size``. Если очередь заполнена,
+    запрос сразу получает 503 с Retry-After вместо ожидания CPU.
+    При ``workers=0`` хэш считается в текущем процессе.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        queue_size: int,
+        retry_after: int,
+        method: str = hash_method("pbkdf2:sha256"),
+    ):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.retry_after = retry_after
+        self.method = method
+
+        self._slots = threading.BoundedSemaphore(queue_size)
+        self._lock = threading.Lock()
+        self._pool: ProcessPoolExecutor | None = None
+        self._pid: int | None = None
+        # обработчик наследуется воркерами, пул закрывает только владелец
+        atexit.register(self.shutdown)
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        # пул создаётся в каждом воркере gunicorn после fork
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._pool = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context("forkserver"),
+                    )
+                    self._pid = os.getpid()
+        return self._pool
+
+    def _drop_pool(self, pool: ProcessPoolExecutor) -> None:
+        # процесс пула упал (OOM, segfault), пул больше не принимает задачи
+        with self._lock:
+            if self._pool is pool:
+                pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+                self._pid = None
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HashingQueueFull(retry_after=self.retry_after)
+
+        try:
+            if not self.workers:
+                return fn(*args)
+
+            pool = self._get_pool()
+            try:
+                return pool.submit(fn, *args).result()
+            except BrokenProcessPool:
+                self._drop_pool(pool)
+                # одна повторная попытка на новом пуле
+                return self._get_pool().submit(fn, *args).result()
+        finally:
+            self._slots.release()
+
+    def generate(self, password: str) -> str:
+        """Hash password"""
+
+        return self._run(generate_password_hash, password, self.method)
+
+    def check(self, pwhash: str, password: str) -> bool:
+        """Check password against hash"""
+
+        return self._run(check_password_hash, pwhash, password)
+
+    def needs_rehash(self, pwhash: str) -> bool:
+        """Hash was made by other algorithm or cost"""
+
+        return pwhash.split("$", 1)[0] != self.method
+
+    def shutdown(self) -> None:
+        """Stop pool of this process on worker exit"""
+
+        if self._pool is not None and self._pid == os.getpid():
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+            self._pid = None
+
+
+password_hasher = PasswordHasher(
+    workers=(
+        os.cpu_count()
+        if cfg.PASSWORD_HASH_WORKERS is None
+        else cfg.PASSWORD_HASH_WORKERS
+    ),
+    queue_size=cfg.PASSWORD_HASH_QUEUE_SIZE,
+    retry_after=cfg.PASSWORD_HASH_RETRY_AFTER,
+    method=hash_method(cfg.PASSWORD_HASH_ALGORITHM, cfg.PASSWORD_HASH_COST),
+)
@@ -0,0 +1,194 @@
+import abc
+import secrets
+import threading
+import time
+from collections import OrderedDict, deque
+
+from werkzeug.exceptions import TooManyRequests
+
+from ..config import cfg
+
+MSG_LOGIN_THROTTLED = "Слишком много неудачных попыток входа"
+
+
+class LoginThrottled(TooManyRequests):
+    """Login is locked out after failed attempts"""
+
+    description = MSG_LOGIN_THROTTLED
+
+
+class AbstractThrottleStorage(abc.ABC):
+    """Storage of failure counters and lockouts"""
+
+    @abc.abstractmethod
+    def locked_until(self, *keys: str) -> float:
+        """Max lockout expiry (unix timestamp) of keys, 0 if not locked"""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def hit(self, key: str, now: float, window: float) -> int:
+        """Record failure, return failures within window"""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def lock(self, key: str, until: float) -> None:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def reset(self, key: str) -> None:
+        raise NotImplementedError
+
+
+class MemoryThrottleStorage(AbstractThrottleStorage):
+    """In-process storage
+
+    Счётчики живут в памяти воркера, число ключей ограничено
+    ``maxsize``, при переполнении вытесняются самые старые.
+    """
+
+    def __init__(self, maxsize: int = 100000):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._failures: OrderedDict[str, deque] = OrderedDict()
+        self._locks: dict[str, float] = {}
+
+    def locked_until(self, *keys: str) -> float:
+        return max((self._locks.get(key, 0.0) for key in keys), default=0.0)
+
+    def hit(self, key: str, now: float, window: float) -> int:
+        with self._lock:
+            failures = self._failures.pop(key, None) or deque()
+            failures.append(now)
+            while failures[0] <= now - window:
+                failures.popleft()
+
+            self._failures[key] = failures
+            while len(self._failures) > self.maxsize:
+                old_key, _ = self._failures.popitem(last=False)
+                self._locks.pop(old_key, None)
+            return len(failures)
+
+    def lock(self, key: str, until: float) -> None:
+        self._locks[key] = until
+
+    def reset(self, key: str) -> None:
+        with self._lock:
+            self._failures.pop(key, None)
+            self._locks.pop(key, None)
+
+
+class RedisThrottleStorage(AbstractThrottleStorage):
+    """Redis storage, shared by all workers
+
+    Окно хранится в sorted set с временем попытки в качестве score,
+    блокировка - ключом с TTL. Подходит любой Redis-совместимый сервер.
+    """
+
+    def __init__(self, url: str, prefix: str = "login-throttle:"):
+        # redis нужен только при этом бэкенде
+        import redis
+
+        self.prefix = prefix
+        self._redis = redis.Redis.from_url(url)
+
+    def locked_until(self, *keys: str) -> float:
+        values = self._redis.mget([f"{self.prefix}lock:{k}" for k in keys])
+        return max((float(v) for v in values if v), default=0.0)
+
+    def hit(self, key: str, now: float, window: float) -> int:
+        name = f"{self.prefix}fail:{key}"
+        pipe = self._redis.pipeline()
+        pipe.zremrangebyscore(name, "-inf", now - window)
+        pipe.zadd(name, {f"{now}:{secrets.token_hex(4)}": now})
+        pipe.zcard(name)
+        pipe.expire(name, int(window) + 1)
+        return pipe.execute()[2]
+
+    def lock(self, key: str, until: float) -> None:
+        self._redis.set(
+            f"{self.prefix}lock:{key}",
+            until,
+            px=max(int((until - time.time()) * 1000), 1),
+        )
+
+    def reset(self, key: str) -> None:
+        self._redis.delete(
+            f"{self.prefix}fail:{key}", f"{self.prefix}lock:{key}"
+        )
+
+
+class LoginThrottle:
+    """Login brute-force throttling
+
+    Неудачные попытки считаются в скользящем окне ``window`` отдельно
+    по логину и по IP клиента. После ``max_failures`` попыток ключ
+    блокируется на ``lockout * 2 ** (n - max_failures)`` секунд, но не
+    больше ``max_lockout``. Проверка выполняется до хэширования пароля,
+    поэтому заблокированная попытка не тратит CPU.
+    """
+
+    def __init__(
+        self,
+        storage: AbstractThrottleStorage,
+        max_failures_login: int,
+        max_failures_ip: int,
+        window: float,
+        lockout: float,
+        max_lockout: float,
+    ):
+        self.storage = storage
+        self.max_failures_login = max_failures_login
+        self.max_failures_ip = max_failures_ip
+        self.window = window
+        self.lockout = lockout
+        self.max_lockout = max_lockout
+
+    @staticmethod
+    def _keys(login: str, ip: str | None) -> tuple[str, str]:
+        return f"login:{login.lower()}", f"ip:{ip}"
+
+    def check(self, login: str, ip: str | None) -> None:
+        """Raise LoginThrottled if login or ip is locked"""
+
+        until = self.storage.locked_until(*self._keys(login, ip))
+        now = time.time()
+        if until > now:
+            raise LoginThrottled(retry_after=int(until - now) + 1)
+
+    def failure(self, login: str, ip: str | None) -> None:
+        """Count failed attempt"""
+
+        now = time.time()
+        login_key, ip_key = self._keys(login, ip)
+        for key, max_failures in (
+            (login_key, self.max_failures_login),
+            (ip_key, self.max_failures_ip),
+        ):
+            failures = self.storage.hit(key, now, self.window)
+            if failures >= max_failures:
+                exp = min(failures - max_failures, 32)
+                delay = min(self.lockout * 2**exp, self.max_lockout)
+                self.storage.lock(key, now + delay)
+
+    def success(self, login: str, ip: str | None) -> None:
+        """Reset login counter, ip counter expires by itself"""
+
+        self.storage.reset(self._keys(login, ip)[0])
+
+
+def build_storage() -> AbstractThrottleStorage:
+    """Throttle storage by settings"""
+
+    if cfg.LOGIN_THROTTLE_STORAGE == "redis":
+        return RedisThrottleStorage(cfg.LOGIN_THROTTLE_REDIS_URL)
+    return MemoryThrottleStorage()
+
+
+login_throttle = LoginThrottle(
+    build_storage(),
+    max_failures_login=cfg.LOGIN_MAX_FAILURES_PER_LOGIN,
+    max_failures_ip=cfg.LOGIN_MAX_FAILURES_PER_IP,
+    window=cfg.LOGIN_FAILURE_WINDOW,
+    lockout=cfg.LOGIN_LOCKOUT,
+    max_lockout=cfg.LOGIN_MAX_LOCKOUT,
+)
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""Micro-benchmark: проверка и декодирование access-токена
+
+Запуск: ``python -m benchmarks.bench_jwt`` из директории authservice.
+"""
+import argparse
+import base64
+import hashlib
+import hmac
+import json
+import timeit
+
+from authservice.config import cfg
+from authservice.utils.jwt_utils import JWTCodec, keyring
+
+secret = cfg.JWT_SECRET
+
+
+def _legacy_get_jwt_token(payload: str) -> str:
+    header = {"alg": "HS256", "typ": "JWT"}
+    header_b64_str = base64.urlsafe_b64encode(
+        json.dumps(header).encode()
+    ).decode()
+    payload_b64_str = base64.urlsafe_b64encode(payload.encode()).decode()
+
+    body = f"{header_b64_str}.{payload_b64_str}"
+    signature = hmac.new(
+        secret.encode(), body.encode(), hashlib.sha256
+    ).hexdigest()
+    return f"{header_b64_str}.{payload_b64_str}.{signature}"
+
+
+def _legacy_check_jwt_token(token: str) -> bool:
+    try:
+        _, body, signature = token.split(".")
+        body_str = base64.urlsafe_b64decode(body).decode("utf-8")
+    except ValueError:
+        return False
+    t = _legacy_get_jwt_token(body_str)
+    return t.split(".")[-1] == signature
+
+
+def _legacy_decode_jwt_token(token: str):
+    if _legacy_check_jwt_token(token):
+        return base64.urlsafe_b64decode(token.split(".")[1]).decode("utf-8")
+    return None
+
+
+PAYLOAD = json.dumps(
+    {
+        "id": "6f1c3a52-1f5e-4b7a-9d3e-2a8c2c9a1e11",
+        "login": "admin",
+        "full_name": "A _A",
+        "role": "admin",
+        "valid_through": "2030-01-01T00:00:00",
+    }
+)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="JWT codec benchmark")
+    parser.add_argument("-n", dest="number", type=int, default=100_000)
+    args = parser.parse_args()
+
+    codec = JWTCodec(secret)
+    token = codec.encode(PAYLOAD)
+    assert token == _legacy_get_jwt_token(PAYLOAD)
+
+    cases = (
+        ("legacy decode_jwt_token", lambda: _legacy_decode_jwt_token(token)),
+        ("JWTCodec.decode", lambda: codec.decode(token)),
+        ("Keyring.decode", lambda: keyring.decode(token)),
+        ("legacy get_jwt_token", lambda: _legacy_get_jwt_token(PAYLOAD)),
+        ("JWTCodec.encode", lambda: codec.encode(PAYLOAD)),
+    )
+    for name, fn in cases:
+        best = min(timeit.repeat(fn, number=args.number, repeat=5))
+        print(f"{name:<26} {args.number / best:>12,.0f} tokens/sec")
+
+
+if __name__ == "__main__":
+    main()
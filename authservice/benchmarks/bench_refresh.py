@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""Benchmark: SQL-запросы и транзакции на один обмен refresh-токена
+
+До атомарной ротации: 6 запросов и 2 транзакции, после: 2 и 1.
+Нужна база с применёнными миграциями (``POSTGRES_URI``).
+Запуск: ``python -m benchmarks.bench_refresh`` из директории authservice.
+"""
+import argparse
+import time
+import uuid
+
+import sqlalchemy as sa
+from werkzeug.security import generate_password_hash
+
+from authservice import create_app
+from authservice.database import db, models
+from authservice.entrypoints import enums
+from authservice.tokens.tokens import TokenManager
+
+
+class StatementCounter:
+    """Count statements and commits on engine"""
+
+    def __init__(self, engine: sa.engine.Engine):
+        self.statements = 0
+        self.commits = 0
+        sa.event.listen(engine, "before_cursor_execute", self._on_execute)
+        sa.event.listen(engine, "commit", self._on_commit)
+
+    def _on_execute(self, *args, **kwargs):
+        self.statements += 1
+
+    def _on_commit(self, *args, **kwargs):
+        self.commits += 1
+
+    def reset(self):
+        self.statements = self.commits = 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Refresh token benchmark")
+    parser.add_argument("-n", dest="number", type=int, default=1000)
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        user = models.User(
+            login=f"bench-{uuid.uuid4()}",
+            password=generate_password_hash("bench"),
+            role=enums.UserRole.USER,
+            full_name="Bench",
+        )
+        db.session.add(user)
+        db.session.commit()
+
+        manager = TokenManager()
+        _, refresh_token = manager.get_token_pair(user.id)
+
+        counter = StatementCounter(db.engine)
+        started = time.perf_counter()
+        for _ in range(args.number):
+            _, refresh_token = manager.refresh_access_token(refresh_token)
+        elapsed = time.perf_counter() - started
+
+        statements = counter.statements / args.number
+        commits = counter.commits / args.number
+        print(f"statements per refresh   {statements:.2f}")
+        print(f"transactions per refresh {commits:.2f}")
+        print(f"refreshes per second     {args.number / elapsed:,.0f}")
+
+        db.session.delete(user)
+        db.session.commit()
+
+
+if __name__ == "__main__":
+    main()
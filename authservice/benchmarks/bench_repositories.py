@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""Micro-benchmark: накладные расходы Python на вызов репозитория
+
+Сессия подменена: вместо запроса в БД выполняется то же, что делает
+SQLAlchemy перед отправкой запроса, - построение ключа и поиск
+скомпилированного запроса в кэше. Время сети и БД не учитывается.
+Запуск: ``python -m benchmarks.bench_repositories`` из директории
+authservice.
+"""
+import argparse
+import datetime
+import timeit
+import uuid
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from authservice.database import models, repositories
+
+dialect = postgresql.psycopg2.dialect()
+
+
+class EmptyResult:
+    """Result stub without rows"""
+
+    def scalar(self):
+        return None
+
+    def scalars(self):
+        return self
+
+    def all(self):
+        return []
+
+
+class CompilingSession:
+    """Session stub compiling statements through compiled cache"""
+
+    def __init__(self):
+        self.compiled_cache = {}
+        self.misses = 0
+
+    def execute(self, statement, params=None):
+        _, _, hit = statement._compile_w_cache(
+            dialect,
+            compiled_cache=self.compiled_cache,
+            column_keys=sorted(params or ()),
+            for_executemany=False,
+            schema_translate_map=None,
+        )
+        if hit is dialect.CACHE_MISS:
+            self.misses += 1
+        return EmptyResult()
+
+
+def _legacy_user_get_by(session, login):
+    where = sa.true()
+    where &= models.User.login == login
+    return session.execute(sa.select(models.User).where(where)).scalar()
+
+
+def _legacy_token_get_by(session, token):
+    where = sa.true()
+    where &= models.Session.token_hash == models.hash_token(token)
+    where &= (
+        models.Session.created_at
+        > repositories.TokenRepository._live_created_after()
+    )
+    return session.execute(sa.select(models.Session).where(where)).scalar()
+
+
+def _legacy_history_fetch_by(session, user_id, before, limit):
+    where = sa.true()
+    where &= models.LoginHistory.user_id == user_id
+    where &= models.LoginHistory.logged_in_at < before
+    return session.execute(
+        sa.select(models.LoginHistory)
+        .where(where)
+        .order_by(sa.desc(models.LoginHistory.logged_in_at))
+        .limit(limit + 1)
+    ).scalars().all()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Repository benchmark")
+    parser.add_argument("-n", dest="number", type=int, default=10_000)
+    args = parser.parse_args()
+
+    session = CompilingSession()
+    users = repositories.UserRepository(session)
+    tokens = repositories.TokenRepository(session)
+    history = repositories.HistoryRepository(session)
+
+    user_id = uuid.uuid4()
+    token = uuid.uuid4()
+    before = datetime.datetime.now()
+
+    cases = (
+        (
+            "legacy users.get_by",
+            lambda: _legacy_user_get_by(session, "admin"),
+        ),
+        ("users.get_by", lambda: users.get_by(login="admin")),
+        (
+            "legacy tokens.get_by",
+            lambda: _legacy_token_get_by(session, token),
+        ),
+        ("tokens.get_by", lambda: tokens.get_by(token=token)),
+        (
+            "legacy history.fetch_by",
+            lambda: _legacy_history_fetch_by(session, user_id, before, 50),
+        ),
+        (
+            "history.fetch_by",
+            lambda: history.fetch_by(user_id=user_id, before=before),
+        ),
+    )
+    for name, fn in cases:
+        fn()
+        session.misses = 0
+        best = min(timeit.repeat(fn, number=args.number, repeat=5))
+        print(
+            f"{name:<24} {best / args.number * 1e6:>8.1f} us/call "
+            f"{session.misses:>6} cache misses"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,16 @@
+import os
+
+# пока поток ждёт хэш пароля из пула процессов, остальные потоки
+# воркера обслуживают другие запросы
+worker_class = "gthread"
+threads = int(os.environ.get("GUNICORN_THREADS", 8))
+
+
+def post_worker_init(worker):
+    """Open DB pool before the worker accepts requests"""
+
+    from authservice.config import cfg
+    from authservice.database.pool import warm_up
+
+    if cfg.DB_POOL_WARMUP:
+        warm_up(worker.wsgi)
@@ -1,13 +1,15 @@
 #!/usr/bin/env python3
 import argparse
 import os
+import statistics
+import time
 
 from loguru import logger
-from werkzeug.security import generate_password_hash
 
 from authservice import create_app
-from authservice.database import db, models
+from authservice.database import db, models, user_import
 from authservice.entrypoints import enums
+from authservice.utils import passwords
 
 app = create_app()
 
@@ -72,7 +74,7 @@ def create_user() -> None:
     with app.app_context():
         user = models.User(
             login=args.login,
-            password=generate_password_hash(args.password),
+            password=passwords.password_hasher.generate(args.password),
             role=args.role,
             full_name=args.full_name,
         )
@@ -82,5 +84,142 @@ def create_user() -> None:
         logger.info(f"User Created: {user.id}")
 
 
+def import_users() -> None:
+    """Функция для массового импорта пользователей из CSV/NDJSON"""
+
+    parser = argparse.ArgumentParser(
+        description="Import users of CSV or NDJSON file"
+    )
+    parser.add_argument(
+        "path",
+        type=str,
+        help="argument -path of file with login, full_name, role and "
+        "password or password_hash (werkzeug format) fields",
+    )
+    parser.add_argument(
+        "--format",
+        choices=["csv", "ndjson"],
+        default=None,
+        help="argument -format Default value by file extension",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=10000,
+        help="argument -batch-size rows per transaction "
+        "Default value is 10000",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="argument -workers hashing processes Default value is cpu count",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        type=str,
+        default=None,
+        help="argument -checkpoint file Default value is '<path>.checkpoint'",
+    )
+    parser.add_argument(
+        "--restart",
+        action="store_true",
+        help="argument -restart ignore checkpoint and start from the top",
+    )
+    parser.add_argument(
+        "--update",
+        action="store_true",
+        help="argument -update existing users instead of skipping them",
+    )
+    args = parser.parse_args()
+
+    started = time.monotonic()
+    with app.app_context():
+        checkpoint = user_import.import_users(
+            db.engine,
+            args.path,
+            method=passwords.password_hasher.method,
+            fmt=args.format,
+            checkpoint_path=args.checkpoint,
+            restart=args.restart,
+            batch_size=args.batch_size,
+            workers=args.workers,
+            update=args.update,
+        )
+
+    logger.info(
+        f"Users imported: {checkpoint.imported:,}, "
+        f"skipped: {checkpoint.skipped:,}, "
+        f"in {time.monotonic() - started:.0f}s"
+    )
+
+
+def _samples(value: str) -> int:
+    samples = int(value)
+    if samples < 2:
+        # statistics.quantiles требует хотя бы два замера
+        raise argparse.ArgumentTypeError("must be at least 2")
+    return samples
+
+
+def calibrate_password_hash() -> None:
+    """Функция для подбора стоимости хэша паролей под целевое время входа"""
+
+    parser = argparse.ArgumentParser(
+        description="Benchmark password hashing on this machine"
+    )
+    parser.add_argument(
+        "--algorithm",
+        choices=list(passwords.DEFAULT_COST),
+        default=app.config["PASSWORD_HASH_ALGORITHM"],
+        help="argument -algorithm Default value from settings",
+    )
+    parser.add_argument(
+        "--target-ms",
+        type=float,
+        default=250,
+        help="argument -target p99 of password check Default value is 250",
+    )
+    parser.add_argument(
+        "--samples",
+        type=_samples,
+        default=20,
+        help="argument -samples per cost Default value is 20",
+    )
+    args = parser.parse_args()
+
+    # начинаем с дешёвой стоимости и удваиваем, пока p99 не превысит цель
+    cost = 2**10 if args.algorithm == "scrypt" else 10000
+    suggested = None
+    while True:
+        method = passwords.hash_method(args.algorithm, cost)
+        pwhash = passwords.generate_password_hash("password", method)
+
+        timings = []
+        for _ in range(args.samples):
+            started = time.perf_counter()
+            passwords.check_password_hash(pwhash, "password")
+            timings.append((time.perf_counter() - started) * 1000)
+        p99 = statistics.quantiles(timings, n=100)[98]
+
+        logger.info(
+            f"{method}: p50={statistics.median(timings):.1f}ms "
+            f"p99={p99:.1f}ms"
+        )
+        if p99 > args.target_ms:
+            break
+        suggested = cost
+        cost *= 2
+
+    if suggested is None:
+        logger.warning(f"Even cost {cost} exceeds {args.target_ms}ms")
+        return
+
+    logger.info(
+        f"Suggested: PASSWORD_HASH_ALGORITHM={args.algorithm} "
+        f"PASSWORD_HASH_COST={suggested}"
+    )
+
+
 if __name__ == "__main__":
     app.run(debug=app.config["FLASK_DEBUG"])
@@ -0,0 +1,97 @@
+"""sessions_partitioning
+
+Revision ID: 7c2e9f4b1a86
+Revises: d52f0c8e7a14
+Create Date: 2026-10-18 13:47:05.118320
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from authservice.config import SESSIONS_RETENTION_DAYS
+
+# revision identifiers, used by Alembic.
+revision = '7c2e9f4b1a86'
+down_revision = 'd52f0c8e7a14'
+branch_labels = None
+depends_on = None
+
+# партиция удаляется целиком, когда все её сессии гарантированно истекли,
+# REFRESH_TOKEN_TTL проверяется по той же константе при загрузке настроек
+RETENTION = f'{SESSIONS_RETENTION_DAYS} days'
+MAINTENANCE_JOB = 'SELECT partman.run_maintenance()'
+
+COLUMNS = 'id, created_at, updated_at, user_id, token, token_hash, expired_at'
+
+
+def _create_indexes(unique_token_hash=False):
+    # уникальный индекс партиционированной таблицы обязан включать created_at
+    op.create_index(op.f('ix_sessions_user_id'), 'sessions', ['user_id'], unique=False)
+    op.create_index(op.f('ix_sessions_token_hash'), 'sessions', ['token_hash'], unique=unique_token_hash)
+    op.create_index('ix_sessions_revoked_updated_at', 'sessions', ['updated_at'], unique=False,
+                    postgresql_where=sa.text('expired_at IS NULL'))
+
+
+def _drop_indexes(table_name):
+    op.drop_index('ix_sessions_revoked_updated_at', table_name=table_name)
+    op.drop_index(op.f('ix_sessions_token_hash'), table_name=table_name)
+    op.drop_index(op.f('ix_sessions_user_id'), table_name=table_name)
+
+
+def _columns():
+    return [
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False, comment='Идентификатор'),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False, comment='Дата создания'),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False, comment='Дата обновления'),
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('token', sa.String(length=1000), nullable=True, comment='Токен доступа'),
+        sa.Column('token_hash', sa.LargeBinary(length=32), nullable=True, comment='SHA-256 токена доступа'),
+        sa.Column('expired_at', sa.DateTime(), nullable=True, comment='Длительность жизни токена'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    ]
+
+
+def upgrade():
+    _drop_indexes('sessions')
+    op.rename_table('sessions', 'sessions_old')
+    op.execute('ALTER TABLE sessions_old RENAME CONSTRAINT sessions_pkey TO sessions_old_pkey')
+
+    op.create_table('sessions',
+                    *_columns(),
+                    sa.PrimaryKeyConstraint('id', 'created_at'),
+                    postgresql_partition_by='RANGE (created_at)'
+                    )
+    _create_indexes()
+
+    op.execute("SELECT partman.create_parent('public.sessions', 'created_at', 'native', 'monthly');")
+    op.execute("UPDATE partman.part_config "
+               f"SET infinite_time_partitions = true, retention = '{RETENTION}', retention_keep_table = false "
+               "WHERE parent_table = 'public.sessions';")
+
+    # переносим только сессии, которые ещё могут быть активны
+    op.execute(f"INSERT INTO sessions ({COLUMNS}) "
+               f"SELECT {COLUMNS} FROM sessions_old "
+               f"WHERE created_at > now() - interval '{RETENTION}';")
+    op.drop_table('sessions_old')
+
+    # создание новых партиций и удаление истёкших (retention) для всех таблиц partman
+    op.execute(f"SELECT cron.schedule('@daily', $${MAINTENANCE_JOB}$$);")
+
+
+def downgrade():
+    op.execute(f"SELECT cron.unschedule(jobid) FROM cron.job WHERE command = '{MAINTENANCE_JOB}';")
+
+    _drop_indexes('sessions')
+    op.rename_table('sessions', 'sessions_old')
+
+    op.create_table('sessions',
+                    *_columns(),
+                    sa.PrimaryKeyConstraint('id'),
+                    )
+    _create_indexes(unique_token_hash=True)
+
+    op.execute(f"INSERT INTO sessions ({COLUMNS}) SELECT {COLUMNS} FROM sessions_old;")
+    op.execute("DELETE FROM partman.part_config WHERE parent_table = 'public.sessions';")
+    op.drop_table('sessions_old')
+    op.execute('DROP TABLE IF EXISTS partman.template_public_sessions;')
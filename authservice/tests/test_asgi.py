@@ -0,0 +1,113 @@
+import datetime
+import uuid
+from unittest import mock
+
+import pytest
+
+from authservice import schemas
+from authservice.config import cfg
+from authservice.database import models, repositories
+from authservice.database.aio import async_db
+from authservice.database.routing import STICKY_COOKIE
+from authservice.utils.jwt_utils import keyring
+
+# зависимости extra asgi
+testclient = pytest.importorskip("starlette.testclient")
+
+
+@pytest.fixture
+def session():
+    repositories.user_cache.clear()
+    session = mock.MagicMock()
+    for name in ("execute", "get", "commit", "rollback", "close"):
+        setattr(session, name, mock.AsyncMock())
+    session.execute.return_value = mock.MagicMock()
+    with mock.patch.object(async_db, "session", return_value=session):
+        yield session
+    repositories.user_cache.clear()
+
+
+@pytest.fixture
+def client(session):
+    from authservice.entrypoints.asgi import create_asgi_app
+
+    # без with: lifespan с подключением к БД не запускается
+    return testclient.TestClient(create_asgi_app())
+
+
+def _access_token(role: str) -> str:
+    payload = schemas.JWTPayload(
+        id=uuid.uuid4(),
+        role=role,
+        login=role,
+        valid_through=datetime.datetime.now() + datetime.timedelta(hours=1),
+    )
+    return keyring.encode(payload.json())
+
+
+class TestIntrospect:
+    """ASGI Introspect Test"""
+
+    body = dict(access_tokens=[], refresh_tokens=[])
+
+    def test_unauthorized(self, client):
+        rv = client.post("/api/v1/user/introspect", json=self.body)
+
+        assert rv.status_code == 401
+
+    def test_forbidden(self, client):
+        rv = client.post(
+            "/api/v1/user/introspect",
+            json=self.body,
+            headers={"X-Auth-Token": _access_token("user")},
+        )
+
+        assert rv.status_code == 403
+
+    def test_admin(self, client):
+        rv = client.post(
+            "/api/v1/user/introspect",
+            json=self.body,
+            headers={"X-Auth-Token": _access_token("admin")},
+        )
+
+        assert rv.status_code == 200
+        assert rv.json() == dict(access_tokens=[], refresh_tokens=[])
+
+
+class TestStickyCookie:
+    """ASGI Replica Sticky Cookie Test"""
+
+    @pytest.fixture(autouse=True)
+    def replicas(self, monkeypatch):
+        monkeypatch.setattr(
+            cfg, "DB_REPLICA_URIS", ["postgresql://replica/postgres"]
+        )
+
+    def test_refresh(self, client, session):
+        user = models.User(
+            id=uuid.uuid4(), role="user", login="user", full_name="User"
+        )
+        session.execute.return_value.first.return_value = mock.Mock(
+            session_id=uuid.uuid4(), user_id=user.id
+        )
+        session.get.return_value = user
+
+        rv = client.post(
+            "/api/v1/user/refresh-token",
+            json=dict(refresh_token=str(uuid.uuid4())),
+        )
+
+        assert rv.status_code == 200
+        assert STICKY_COOKIE in rv.cookies
+
+    def test_refresh_unknown(self, client, session):
+        session.execute.return_value.first.return_value = None
+
+        rv = client.post(
+            "/api/v1/user/refresh-token",
+            json=dict(refresh_token=str(uuid.uuid4())),
+        )
+
+        assert rv.status_code == 401
+        assert STICKY_COOKIE not in rv.cookies
@@ -0,0 +1,92 @@
+import asyncio
+import uuid
+from unittest import mock
+
+import pytest
+
+from authservice.database import models, repositories
+from authservice.database.aio import async_db
+from authservice.tokens.async_tokens import (
+    AsyncTokenManager,
+    async_revocation_list,
+)
+from authservice.unit_of_work import AsyncUnitOfWork
+
+
+@pytest.fixture
+def session():
+    repositories.user_cache.clear()
+    session = mock.MagicMock()
+    for name in ("execute", "get", "commit", "rollback", "close"):
+        setattr(session, name, mock.AsyncMock())
+    session.execute.return_value = mock.MagicMock()
+    with mock.patch.object(async_db, "session", return_value=session):
+        yield session
+    repositories.user_cache.clear()
+
+
+async def _refresh(refresh_token: uuid.UUID):
+    async with AsyncUnitOfWork() as uow:
+        return await AsyncTokenManager(uow).refresh_access_token(
+            refresh_token
+        )
+
+
+class TestAsyncTokenManager:
+    """Async Token Manager Test"""
+
+    def test_refresh(self, session):
+        user = models.User(
+            id=uuid.uuid4(), role="user", login="user", full_name="User"
+        )
+        session_id = uuid.uuid4()
+        session.execute.return_value.first.return_value = mock.Mock(
+            session_id=session_id, user_id=user.id
+        )
+        session.get.return_value = user
+
+        access_token, _ = asyncio.run(_refresh(uuid.uuid4()))
+
+        payload = AsyncTokenManager(None).decode_access_token(access_token)
+        assert payload.id == user.id
+        assert payload.login == "user"
+        assert async_revocation_list.is_revoked(session_id)
+
+        session.add.assert_called_once()
+        session.commit.assert_awaited_once()
+        session.close.assert_awaited_once()
+
+        # запись пользователя берётся из кэша
+        asyncio.run(_refresh(uuid.uuid4()))
+        session.get.assert_awaited_once()
+
+    def test_refresh_unknown(self, session):
+        session.execute.return_value.first.return_value = None
+
+        assert asyncio.run(_refresh(uuid.uuid4())) is None
+
+        session.rollback.assert_awaited_once()
+        session.commit.assert_not_awaited()
+
+    def test_refresh_deleted_user(self, session):
+        session.execute.return_value.first.return_value = mock.Mock(
+            session_id=uuid.uuid4(), user_id=uuid.uuid4()
+        )
+        session.get.return_value = None
+
+        assert asyncio.run(_refresh(uuid.uuid4())) is None
+
+        session.rollback.assert_awaited_once()
+        session.commit.assert_not_awaited()
+
+    def test_rollback_on_error(self, session):
+        async def fail():
+            async with AsyncUnitOfWork() as uow:
+                assert uow.tokens is uow.tokens
+                raise RuntimeError
+
+        with pytest.raises(RuntimeError):
+            asyncio.run(fail())
+
+        session.rollback.assert_awaited_once()
+        session.close.assert_awaited_once()
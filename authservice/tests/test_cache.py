@@ -0,0 +1,34 @@
+import time
+
+from authservice.utils.cache import TTLCache
+
+
+class TestTTLCache:
+    """TTL Cache Test"""
+
+    def test_get_set(self):
+        cache = TTLCache(2)
+        cache.set("a", 1, time.time() + 60)
+
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_expired(self):
+        cache = TTLCache(2)
+        cache.set("a", 1, time.time() - 1)
+
+        assert cache.get("a") is None
+        assert len(cache) == 0
+
+    def test_lru_eviction(self):
+        cache = TTLCache(2)
+        expires_at = time.time() + 60
+        cache.set("a", 1, expires_at)
+        cache.set("b", 2, expires_at)
+        cache.get("a")
+        cache.set("c", 3, expires_at)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
@@ -0,0 +1,89 @@
+import uuid
+from unittest import mock
+
+import pytest
+import sqlalchemy as sa
+
+from authservice.database import history_writer as module
+from authservice.database.history_writer import LoginHistoryWriter
+from authservice.utils.metrics import MetricsRegistry
+
+
+@pytest.fixture
+def writer(monkeypatch):
+    monkeypatch.setattr(module, "db", mock.MagicMock())
+    monkeypatch.setattr(module, "metrics", MetricsRegistry())
+
+    writer = LoginHistoryWriter(
+        enabled=True, batch_size=100, flush_interval=60, max_size=3
+    )
+    writer.init_app(mock.MagicMock())
+    yield writer
+    writer._rows.clear()
+    writer.close()
+
+
+def _execute(writer) -> mock.MagicMock:
+    return module.db.engine.begin.return_value.__enter__.return_value.execute
+
+
+class TestLoginHistoryWriter:
+    """Login History Writer Test"""
+
+    def test_flush(self, writer):
+        user_id = uuid.uuid4()
+        writer.add(user_id=user_id, user_agent="ua")
+        writer.add(user_id=user_id, user_agent="ua")
+
+        assert module.metrics.collect()["login_history_buffer_depth"] == 2
+        assert writer.lag() >= 0
+
+        assert writer.flush() == 2
+        rows = _execute(writer).call_args.args[1]
+        assert [r["user_id"] for r in rows] == [user_id, user_id]
+        assert writer.lag() == 0
+
+    def test_flush_on_overflow(self, writer):
+        for _ in range(3):
+            writer.add(user_id=uuid.uuid4(), user_agent=None)
+
+        assert len(writer._rows) == 0
+        assert writer.flushed == 3
+
+    def test_failed_flush_keeps_rows(self, writer):
+        _execute(writer).side_effect = RuntimeError("db is down")
+        writer.add(user_id=uuid.uuid4(), user_agent=None)
+
+        assert writer.flush() == 0
+        assert len(writer._rows) == 1
+        assert writer.errors == 1
+
+    def test_rejected_row_dropped(self, writer):
+        bad_user_id = uuid.uuid4()
+
+        def execute(statement, rows):
+            # FK нарушает любая пачка со строкой удалённого пользователя
+            if any(r["user_id"] == bad_user_id for r in rows):
+                raise sa.exc.IntegrityError("INSERT", {}, Exception("fk"))
+
+        _execute(writer).side_effect = execute
+        writer.add(user_id=uuid.uuid4(), user_agent=None)
+        writer.add(user_id=bad_user_id, user_agent=None)
+
+        assert writer.flush() == 1
+        assert len(writer._rows) == 0
+        assert writer.dropped == 1
+        assert writer.flushed == 1
+
+        # следующие пачки не блокируются плохой строкой
+        writer.add(user_id=uuid.uuid4(), user_agent=None)
+        assert writer.flush() == 1
+
+
+def test_metrics_render():
+    registry = MetricsRegistry()
+    registry.gauge("depth", "Buffer depth", lambda: 2)
+
+    assert registry.render() == (
+        "# HELP depth Buffer depth\n# TYPE depth gauge\ndepth 2.0\n"
+    )
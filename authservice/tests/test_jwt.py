@@ -0,0 +1,155 @@
+import json
+import os
+
+import pytest
+from cryptography.hazmat.primitives.asymmetric.ed25519 import (
+    Ed25519PrivateKey,
+)
+
+from authservice.utils.jwt_utils import (
+    Ed25519JWTCodec,
+    JWTCodec,
+    Keyring,
+    load_codec,
+)
+
+PAYLOAD = json.dumps({"id": "1", "role": "admin"})
+
+
+class TestJWTCodec:
+    """JWT Codec Test"""
+
+    def test_round_trip(self):
+        codec = JWTCodec("secret")
+        token = codec.encode(PAYLOAD)
+
+        assert codec.decode(token) == PAYLOAD
+        assert codec.verify(token)
+
+    def test_wrong_key(self):
+        token = JWTCodec("secret").encode(PAYLOAD)
+
+        assert JWTCodec("other").decode(token) is None
+
+    @pytest.mark.parametrize(
+        "token",
+        ["", "abc", "a.b", "a.b.c", "a.b.zz", "..", "a..00"],
+    )
+    def test_malformed(self, token):
+        assert JWTCodec("secret").decode(token) is None
+
+    def test_tampered_payload(self):
+        codec = JWTCodec("secret")
+        header, _, signature = codec.encode(PAYLOAD).split(".")
+        forged = codec.encode(json.dumps({"id": "1", "role": "root"}))
+
+        token = f"{header}.{forged.split('.')[1]}.{signature}"
+
+        assert codec.decode(token) is None
+
+
+class TestEd25519JWTCodec:
+    """EdDSA JWT Codec Test"""
+
+    def test_round_trip(self):
+        private_key = Ed25519PrivateKey.generate()
+        codec = Ed25519JWTCodec(private_key.public_key(), private_key)
+        token = codec.encode(PAYLOAD)
+
+        assert codec.decode(token) == PAYLOAD
+        assert "=" not in token
+
+    def test_verify_by_public_key(self):
+        private_key = Ed25519PrivateKey.generate()
+        token = Ed25519JWTCodec(private_key.public_key(), private_key).encode(
+            PAYLOAD
+        )
+        verifier = Ed25519JWTCodec(private_key.public_key())
+
+        assert verifier.decode(token) == PAYLOAD
+        assert Ed25519JWTCodec(
+            Ed25519PrivateKey.generate().public_key()
+        ).decode(token) is None
+
+    def test_jwk(self):
+        private_key = Ed25519PrivateKey.generate()
+        codec = Ed25519JWTCodec(private_key.public_key(), kid="key-1")
+
+        jwk = codec.jwk()
+
+        assert jwk["kid"] == "key-1"
+        assert jwk["kty"] == "OKP"
+        assert JWTCodec("secret").jwk() is None
+
+
+class TestKeyring:
+    """Keyring Test"""
+
+    def test_verify_by_kid(self):
+        old, new = JWTCodec("old", kid="k1"), JWTCodec("new", kid="k2")
+        keyring = Keyring([old, new], active="k2")
+
+        assert keyring.decode(old.encode(PAYLOAD)) == PAYLOAD
+        assert keyring.decode(keyring.encode(PAYLOAD)) == PAYLOAD
+        assert new.decode(keyring.encode(PAYLOAD)) == PAYLOAD
+
+    def test_legacy_token_without_kid(self):
+        legacy = JWTCodec("legacy")
+        keyring = Keyring(
+            [legacy, JWTCodec("new", kid="k2")],
+            active="k2",
+        )
+
+        assert keyring.decode(legacy.encode(PAYLOAD)) == PAYLOAD
+
+    def test_unknown_kid(self):
+        keyring = Keyring([JWTCodec("new", kid="k2")], active="k2")
+
+        assert keyring.decode(JWTCodec("x", kid="k3").encode(PAYLOAD)) is None
+        assert keyring.decode(JWTCodec("x").encode(PAYLOAD)) is None
+
+    def test_reload(self, tmp_path):
+        path = tmp_path / "keys.json"
+        path.write_text(
+            json.dumps(
+                {"active": "k1", "keys": [{"kid": "k1", "secret": "s1"}]}
+            )
+        )
+        keyring = Keyring(path=str(path), reload_interval=0)
+        token = keyring.encode(PAYLOAD)
+        generation = keyring.generation
+
+        path.write_text(
+            json.dumps(
+                {
+                    "active": "k2",
+                    "keys": [
+                        {"kid": "k2", "secret": "s2"},
+                        {"kid": "k1", "secret": "s1"},
+                    ],
+                }
+            )
+        )
+        os.utime(path, ns=(0, 1))
+
+        assert keyring.active.kid == "k2"
+        assert keyring.generation == generation + 1
+        assert keyring.decode(token) == PAYLOAD
+
+    def test_active_key_must_sign(self):
+        public_key = Ed25519PrivateKey.generate().public_key()
+
+        with pytest.raises(ValueError):
+            Keyring([Ed25519JWTCodec(public_key, kid="k1")], active="k1")
+
+
+class TestLoadCodec:
+    """Load Codec Test"""
+
+    def test_secret_required(self):
+        with pytest.raises(ValueError, match="Secret is required"):
+            load_codec(alg="HS256", kid="k1")
+
+    def test_key_file_required(self):
+        with pytest.raises(ValueError, match="Key file is required"):
+            load_codec(alg="EdDSA", kid="k1")
@@ -0,0 +1,72 @@
+import datetime
+import uuid
+from unittest import mock
+
+import pytest
+import sqlalchemy as sa
+
+from authservice import schemas
+from authservice.config import cfg
+from authservice.database import repositories
+from authservice.utils.pagination import decode_cursor, encode_cursor
+
+
+class TestCursor:
+    """Keyset Cursor Test"""
+
+    def test_roundtrip(self):
+        created_at = datetime.datetime.now(datetime.timezone.utc)
+        id_ = uuid.uuid4()
+
+        assert decode_cursor(encode_cursor(created_at, id_)) == (
+            created_at,
+            id_,
+        )
+
+    @pytest.mark.parametrize("cursor", ["", "abc", "W10", "WzEsMl0"])
+    def test_invalid(self, cursor):
+        with pytest.raises(ValueError):
+            decode_cursor(cursor)
+
+        with pytest.raises(ValueError):
+            schemas.ArgsPaginate(cursor=cursor)
+
+
+class TestCount:
+    """Count Strategy Test"""
+
+    @pytest.fixture
+    def repo(self, monkeypatch):
+        monkeypatch.setattr(cfg, "LIST_COUNT_STRATEGY", "cached")
+        repositories.count_cache.clear()
+
+        repo = repositories.UserRepository(mock.MagicMock())
+        repo.session.execute.return_value.scalar.return_value = 7
+        return repo
+
+    def test_cached(self, repo):
+        query = schemas.ArgsPaginate()
+
+        assert repo._count(sa.true(), query, "admin") == 7
+        assert repo._count(sa.true(), query, "admin") == 7
+        assert repo.session.execute.call_count == 1
+
+        repositories.count_generation["users"] += 1
+        assert repo._count(sa.true(), query, "admin") == 7
+        assert repo.session.execute.call_count == 2
+
+    def test_without_total(self, repo):
+        query = schemas.ArgsPaginate(with_total=False)
+
+        assert repo._count(sa.true(), query) is None
+        repo.session.execute.assert_not_called()
+
+    def test_invalidate_on_update(self):
+        generation = repositories.count_generation["users"]
+        session = mock.MagicMock(
+            new=[], dirty=[mock.Mock(__tablename__="users")], deleted=[]
+        )
+
+        repositories._invalidate_counts(session, None)
+
+        assert repositories.count_generation["users"] == generation + 1
@@ -0,0 +1,90 @@
+import atexit
+from unittest import mock
+
+import pytest
+
+from authservice.utils.passwords import (
+    HashingQueueFull,
+    PasswordHasher,
+    generate_password_hash,
+    hash_method,
+)
+
+
+class TestPasswordHasher:
+    """Password Hasher Test"""
+
+    def test_generate_check(self):
+        hasher = PasswordHasher(workers=0, queue_size=1, retry_after=1)
+        pwhash = hasher.generate("secret")
+
+        assert hasher.check(pwhash, "secret")
+        assert not hasher.check(pwhash, "wrong")
+
+    def test_pool(self):
+        hasher = PasswordHasher(workers=1, queue_size=1, retry_after=1)
+        try:
+            assert hasher.check(hasher.generate("secret"), "secret")
+        finally:
+            hasher.shutdown()
+
+    def test_broken_pool(self):
+        hasher = PasswordHasher(workers=1, queue_size=1, retry_after=1)
+        try:
+            pwhash = hasher.generate("secret")
+            pool = hasher._get_pool()
+            for process in list(pool._processes.values()):
+                process.kill()
+                process.join()
+
+            assert hasher.check(pwhash, "secret")
+            assert hasher._pool is not pool
+        finally:
+            hasher.shutdown()
+
+    def test_shutdown_at_exit(self):
+        with mock.patch.object(atexit, "register") as register:
+            hasher = PasswordHasher(workers=1, queue_size=1, retry_after=1)
+        register.assert_called_once_with(hasher.shutdown)
+
+        hasher.generate("secret")
+        pool = hasher._pool
+        hasher.shutdown()
+
+        assert hasher._pool is None
+        with pytest.raises(RuntimeError):
+            pool.submit(abs, 1)
+
+    def test_queue_full(self):
+        hasher = PasswordHasher(workers=0, queue_size=1, retry_after=3)
+        hasher._slots.acquire()
+
+        with pytest.raises(HashingQueueFull) as e:
+            hasher.generate("secret")
+        assert e.value.code == 503
+        assert ("Retry-After", "3") in e.value.get_headers()
+
+    @pytest.mark.parametrize("algorithm", ["pbkdf2:sha256", "scrypt"])
+    def test_algorithm(self, algorithm):
+        method = hash_method(algorithm, 2**10)
+        hasher = PasswordHasher(
+            workers=0, queue_size=1, retry_after=1, method=method
+        )
+        pwhash = hasher.generate("secret")
+
+        assert pwhash.startswith(method + "$")
+        assert hasher.check(pwhash, "secret")
+        assert not hasher.check(pwhash, "wrong")
+        assert not hasher.needs_rehash(pwhash)
+
+    def test_needs_rehash(self):
+        hasher = PasswordHasher(
+            workers=0,
+            queue_size=1,
+            retry_after=1,
+            method=hash_method("scrypt", 2**10),
+        )
+        pwhash = generate_password_hash("secret", hash_method("pbkdf2:sha256"))
+
+        assert hasher.needs_rehash(pwhash)
+        assert hasher.check(pwhash, "secret")
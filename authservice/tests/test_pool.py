@@ -0,0 +1,41 @@
+import pytest
+import sqlalchemy as sa
+
+from authservice.database.pool import InstrumentedQueuePool, pool_stats
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = sa.create_engine(
+        f"sqlite:///{tmp_path / 'db.sqlite'}",
+        poolclass=InstrumentedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.01,
+    )
+    yield engine
+    engine.dispose()
+
+
+class TestInstrumentedQueuePool:
+    """Instrumented Pool Test"""
+
+    def test_checkout_and_lifetime(self, engine):
+        checkouts, closed = pool_stats.checkouts, pool_stats.closed
+
+        with engine.connect() as conn:
+            conn.execute(sa.text("SELECT 1"))
+        engine.dispose()
+
+        assert pool_stats.checkouts == checkouts + 1
+        assert pool_stats.closed == closed + 1
+
+    def test_timeout(self, engine):
+        timeouts = pool_stats.timeouts
+
+        with engine.connect():
+            with pytest.raises(sa.exc.TimeoutError):
+                engine.connect()
+
+        assert pool_stats.timeouts == timeouts + 1
+        assert pool_stats.max_wait_seconds >= 0.01
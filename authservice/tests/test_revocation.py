@@ -0,0 +1,69 @@
+import datetime
+import threading
+import uuid
+from unittest import mock
+
+from authservice.tokens.revocation import RevocationList
+
+
+def _revocation_list(rows=()):
+    revocation_list = RevocationList(
+        window=datetime.timedelta(minutes=60),
+        sync_interval=60,
+    )
+    revocation_list._uow = mock.MagicMock()
+    revocation_list._uow.tokens.fetch_revoked.return_value = list(rows)
+    return revocation_list
+
+
+class TestRevocationList:
+    """Revocation List Test"""
+
+    def test_sync(self):
+        session_id = uuid.uuid4()
+        now = datetime.datetime.now(datetime.timezone.utc)
+        revocation_list = _revocation_list([(session_id, now)])
+
+        assert revocation_list.is_revoked(session_id)
+        assert not revocation_list.is_revoked(uuid.uuid4())
+
+    def test_add_without_sync(self):
+        revocation_list = _revocation_list()
+        revocation_list._next_sync = float("inf")
+        session_id = uuid.uuid4()
+
+        revocation_list.add([session_id])
+
+        assert revocation_list.is_revoked(session_id)
+
+    def test_window(self):
+        session_id = uuid.uuid4()
+        revoked_at = datetime.datetime.now(
+            datetime.timezone.utc
+        ) - datetime.timedelta(hours=3)
+        revocation_list = _revocation_list([(session_id, revoked_at)])
+
+        assert not revocation_list.is_revoked(session_id)
+
+    def test_add_during_merge(self):
+        revocation_list = _revocation_list()
+        now = datetime.datetime.now(datetime.timezone.utc)
+        stale = now - datetime.timedelta(hours=3)
+        stop = threading.Event()
+
+        def add():
+            while not stop.is_set():
+                revocation_list.add([uuid.uuid4() for _ in range(100)])
+
+        thread = threading.Thread(target=add)
+        thread.start()
+        try:
+            for _ in range(200):
+                revocation_list.merge(
+                    [(uuid.uuid4(), stale) for _ in range(100)], now
+                )
+        finally:
+            stop.set()
+            thread.join()
+
+        assert all(v >= now for v in revocation_list._revoked.values())
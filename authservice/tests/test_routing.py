@@ -0,0 +1,53 @@
+import time
+from unittest import mock
+
+import flask
+import pytest
+import sqlalchemy as sa
+
+from authservice.database.routing import (
+    STICKY_COOKIE,
+    RoutingSession,
+    route_reads,
+)
+
+
+@pytest.fixture
+def session():
+    db = mock.MagicMock()
+    db.engines = {
+        None: sa.create_engine("sqlite://"),
+        "replica_0": sa.create_engine("sqlite://"),
+    }
+    return RoutingSession(db)
+
+
+class TestRoutingSession:
+    """Replica Routing Test"""
+
+    def test_primary_by_default(self, session):
+        primary = session._db.engines[None]
+        assert session.get_bind(clause=sa.select(1)) is primary
+
+    def test_replica_reads(self, session):
+        app = flask.Flask(__name__)
+        with app.test_request_context():
+            assert route_reads(session) == "replica_0"
+
+        replica = session._db.engines["replica_0"]
+        assert session.get_bind(clause=sa.select(1)) is replica
+        assert session.get_bind(clause=sa.text("SELECT 1")) is not replica
+        stmt = sa.lambda_stmt(lambda: sa.select(1))
+        assert session.get_bind(clause=stmt) is replica
+
+        session.info["wrote"] = True
+        assert session.get_bind(clause=sa.select(1)) is not replica
+
+    def test_sticky(self, session):
+        app = flask.Flask(__name__)
+        cookie = f"{STICKY_COOKIE}={time.time() + 5}"
+        with app.test_request_context(headers={"Cookie": cookie}):
+            assert route_reads(session) is None
+
+        primary = session._db.engines[None]
+        assert session.get_bind(clause=sa.select(1)) is primary
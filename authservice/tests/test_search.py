@@ -0,0 +1,57 @@
+import pytest
+import sqlalchemy as sa
+
+from authservice import schemas
+from authservice.database import db, models
+from authservice.database.repositories import UserRepository
+from authservice.entrypoints import enums
+
+
+def _explain(query: schemas.ArgsUser) -> str:
+    where, rank = UserRepository.search_where(query)
+    stmt = sa.select(models.User.id).where(where)
+    if rank is not None:
+        stmt = stmt.order_by(sa.desc(rank))
+
+    # на тестовых данных планировщик выбрал бы seq scan
+    db.session.execute(sa.text("SET LOCAL enable_seqscan = off"))
+    compiled = stmt.compile(db.engine)
+    rows = db.session.execute(
+        sa.text(f"EXPLAIN {compiled}"), compiled.params
+    ).scalars()
+    plan = "\n".join(rows)
+    db.session.rollback()
+    return plan
+
+
+class TestUserSearchPlan:
+    """User Search EXPLAIN Test"""
+
+    @pytest.mark.parametrize("search", list(enums.UserSearch))
+    def test_q(self, app, search):
+        plan = _explain(schemas.ArgsUser(q="admin", search=search))
+
+        assert "ix_users_full_name_trgm" in plan
+        assert "ix_users_login_trgm" in plan
+
+    def test_full_name(self, app):
+        plan = _explain(schemas.ArgsUser(full_name="adm"))
+
+        assert "ix_users_full_name_trgm" in plan
+
+
+@pytest.mark.use_user("admin")
+class TestUsersSearchApi:
+    """Users Search Api Test"""
+
+    @pytest.mark.parametrize(
+        "search, q",
+        [("contains", "dmi"), ("prefix", "adm"), ("similar", "admn")],
+    )
+    def test_get(self, client, headers, search, q):
+        rv = client.get(
+            f"api/v1/user/users?q={q}&search={search}", headers=headers
+        )
+
+        assert rv.status_code == 200
+        assert "admin" in [i["login"] for i in rv.json["items"]]
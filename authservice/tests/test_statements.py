@@ -0,0 +1,61 @@
+import datetime
+import uuid
+from unittest import mock
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from authservice.database import repositories
+from authservice.utils.pagination import encode_cursor
+
+dialect = postgresql.psycopg2.dialect()
+
+
+@pytest.fixture
+def session():
+    return mock.MagicMock()
+
+
+def _compile(statement, cache, params=None):
+    compiled, extracted, hit = statement._compile_w_cache(
+        dialect,
+        compiled_cache=cache,
+        column_keys=sorted(params or ()),
+        for_executemany=False,
+        schema_translate_map=None,
+    )
+    params = compiled.construct_params(
+        params, extracted_parameters=extracted
+    )
+    return params, hit
+
+
+class TestCachedStatements:
+    """Repository Statements Test"""
+
+    def test_user_get_by(self, session):
+        users = repositories.UserRepository(session)
+
+        users.get_by(login="admin")
+        users.get_by(login="user")
+
+        first, second = session.execute.call_args_list
+        assert first.args[0] is second.args[0]
+        assert second.args[1] == {"login": "user"}
+
+    def test_history_fetch_by(self, session):
+        history = repositories.HistoryRepository(session)
+        cache = {}
+
+        hits = []
+        for limit in (10, 20):
+            user_id = uuid.uuid4()
+            cursor = encode_cursor(datetime.datetime.now(), uuid.uuid4())
+            history.fetch_by(user_id=user_id, cursor=cursor, limit=limit)
+
+            params, hit = _compile(session.execute.call_args.args[0], cache)
+            hits.append(hit)
+            assert params["user_id_1"] == user_id
+            assert params["fetch_1"] == limit + 1
+
+        assert hits == [dialect.CACHE_MISS, dialect.CACHE_HIT]
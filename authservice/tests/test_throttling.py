@@ -0,0 +1,74 @@
+import time
+
+import pytest
+
+from authservice.utils.throttling import (
+    LoginThrottle,
+    LoginThrottled,
+    MemoryThrottleStorage,
+)
+
+
+@pytest.fixture
+def throttle():
+    return LoginThrottle(
+        MemoryThrottleStorage(),
+        max_failures_login=3,
+        max_failures_ip=5,
+        window=60,
+        lockout=10,
+        max_lockout=60,
+    )
+
+
+class TestLoginThrottle:
+    """Login Throttle Test"""
+
+    def test_lockout_by_login(self, throttle):
+        for _ in range(2):
+            throttle.failure("admin", "10.0.0.1")
+        throttle.check("admin", "10.0.0.1")
+
+        throttle.failure("admin", "10.0.0.2")
+        with pytest.raises(LoginThrottled) as e:
+            throttle.check("ADMIN", "10.0.0.3")
+        assert e.value.code == 429
+
+        # другой логин с другого адреса не заблокирован
+        throttle.check("user", "10.0.0.3")
+
+    def test_lockout_by_ip(self, throttle):
+        for i in range(5):
+            throttle.failure(f"user{i}", "10.0.0.1")
+
+        with pytest.raises(LoginThrottled):
+            throttle.check("other", "10.0.0.1")
+
+    def test_exponential_lockout(self, throttle):
+        storage = throttle.storage
+        for _ in range(3):
+            throttle.failure("admin", None)
+        first = storage.locked_until("login:admin")
+
+        throttle.failure("admin", None)
+        second = storage.locked_until("login:admin")
+        assert second - time.time() > first - time.time() + 5
+
+        for _ in range(10):
+            throttle.failure("admin", None)
+        assert storage.locked_until("login:admin") <= time.time() + 60
+
+    def test_success_resets_login(self, throttle):
+        for _ in range(3):
+            throttle.failure("admin", "10.0.0.1")
+        throttle.success("admin", "10.0.0.1")
+
+        throttle.check("admin", "10.0.0.1")
+
+    def test_sliding_window(self):
+        storage = MemoryThrottleStorage()
+        now = time.time()
+
+        assert storage.hit("k", now - 100, 60) == 1
+        assert storage.hit("k", now - 30, 60) == 1
+        assert storage.hit("k", now, 60) == 2
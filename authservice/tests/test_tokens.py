@@ -0,0 +1,56 @@
+import datetime
+import uuid
+
+from authservice import schemas
+from authservice.database import models
+from authservice.tokens.tokens import TokenManager, access_token_cache
+from authservice.utils.jwt_utils import keyring
+from authservice.utils.metrics import metrics
+
+
+def _access_token(**kwargs) -> str:
+    payload = schemas.JWTPayload(
+        id=uuid.uuid4(),
+        role="user",
+        valid_through=datetime.datetime.now() + datetime.timedelta(minutes=5),
+        **kwargs,
+    )
+    return keyring.encode(payload.json())
+
+
+class TestDecodeAccessToken:
+    """Access Token Decode Test"""
+
+    def test_cached(self):
+        token = _access_token(login="cached")
+        hits = access_token_cache.hits
+
+        first = TokenManager().decode_access_token(token)
+        second = TokenManager().decode_access_token(token)
+
+        assert first.login == "cached"
+        assert second is first
+        assert access_token_cache.hits == hits + 1
+        assert metrics.collect()["access_token_cache_hits"] == hits + 1
+
+    def test_forged_signature_reuse(self):
+        token = _access_token(login="cached")
+        TokenManager().decode_access_token(token)
+
+        signature = token.rpartition(".")[2]
+        forged = _access_token(login="forged").rpartition(".")[0]
+
+        assert TokenManager().decode_access_token(f"{forged}.{signature}") is None
+
+
+class TestSessionTokenHash:
+    """Session Token Hash Test"""
+
+    def test_set_token(self):
+        token = uuid.uuid4()
+        row = models.Session(user_id=uuid.uuid4())
+
+        row.token = token
+
+        assert row.token_hash == models.hash_token(str(token))
+        assert len(row.token_hash) == 32
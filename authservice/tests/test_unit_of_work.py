@@ -0,0 +1,50 @@
+from unittest import mock
+
+import pytest
+
+from authservice.database import repositories
+from authservice.unit_of_work import UnitOfWork
+
+
+@pytest.fixture
+def uow():
+    uow = UnitOfWork(deferred=True)
+    uow._session = mock.MagicMock()
+    return uow
+
+
+class TestUnitOfWork:
+    """Unit Of Work Test"""
+
+    def test_lazy_repositories(self, uow):
+        assert "tokens" not in vars(uow)
+
+        assert isinstance(uow.users, repositories.UserRepository)
+        assert uow.users is uow.users
+        assert "tokens" not in vars(uow)
+
+        with pytest.raises(AttributeError):
+            uow.unknown
+
+    def test_deferred_commit(self, uow):
+        with uow:
+            uow.commit()
+        with uow:
+            uow.commit()
+
+        uow._session.commit.assert_not_called()
+        assert uow._session.flush.call_count == 2
+
+        uow.complete()
+        uow.complete()
+        uow._session.commit.assert_called_once()
+
+    def test_rollback_on_error(self, uow):
+        with pytest.raises(RuntimeError):
+            with uow:
+                uow.commit()
+                raise RuntimeError
+
+        uow.complete()
+        uow._session.rollback.assert_called_once()
+        uow._session.commit.assert_not_called()
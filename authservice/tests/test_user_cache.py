@@ -0,0 +1,55 @@
+import uuid
+from unittest import mock
+
+import pytest
+
+from authservice.database import models, repositories
+
+
+@pytest.fixture
+def users():
+    repositories.user_cache.clear()
+    session = mock.MagicMock()
+    session.info = {}
+    yield repositories.UserRepository(session)
+    repositories.user_cache.clear()
+
+
+def _user():
+    return models.User(
+        id=uuid.uuid4(), role="user", login="user", full_name="User"
+    )
+
+
+class TestUserCache:
+    """User Record Cache Test"""
+
+    def test_get_record(self, users):
+        row = _user()
+        users.session.get.return_value = row
+
+        record = users.get_record(row.id)
+        assert record == (row.id, "user", "user", "User")
+        assert users.get_record(row.id) == record
+
+        users.session.get.assert_called_once_with(models.User, row.id)
+
+    def test_get_missing(self, users):
+        users.session.get.return_value = None
+
+        assert users.get_record(uuid.uuid4()) is None
+        assert len(repositories.user_cache) == 0
+
+    def test_invalidate(self, users):
+        row = _user()
+        users.session.get.return_value = row
+        users.get_record(row.id)
+
+        users.invalidate(row.id)
+        assert len(repositories.user_cache) == 0
+
+        # запись, прочитанная до коммита, сбрасывается после него
+        users.get_record(row.id)
+        repositories._invalidate_users(users.session)
+        assert len(repositories.user_cache) == 0
+        assert not users.session.info
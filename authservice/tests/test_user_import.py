@@ -0,0 +1,109 @@
+import csv
+import json
+from unittest import mock
+
+import pytest
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from authservice.database import user_import
+
+METHOD = "pbkdf2:sha256:1"
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "users.csv"
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(
+            f, ["login", "full_name", "role", "password", "password_hash"]
+        )
+        writer.writeheader()
+        writer.writerow(dict(login="a", full_name="A", password="pa"))
+        writer.writerow(dict(login="", password="skip"))
+        writer.writerow(
+            dict(
+                login="b",
+                role="admin",
+                password_hash=generate_password_hash("pb", METHOD),
+            )
+        )
+        writer.writerow(dict(login="c", role="root", password="skip"))
+        writer.writerow(dict(login="d", password="pd"))
+        writer.writerow(dict(login="e" * 256, password="skip"))
+        writer.writerow(dict(login="f", full_name="F" * 256, password="skip"))
+        writer.writerow(
+            dict(login="g", password_hash=f"pbkdf2:sha256:1$salt${'0' * 256}")
+        )
+    return str(path)
+
+
+@pytest.fixture
+def engine():
+    engine = mock.MagicMock()
+    conn = engine.raw_connection.return_value
+    cursor = conn.cursor.return_value.__enter__.return_value
+    cursor.copied = []
+
+    def copy_expert(sql, buf):
+        rows = list(csv.reader(buf))
+        cursor.copied.append(rows)
+        cursor.rowcount = len(rows)
+
+    cursor.copy_expert.side_effect = copy_expert
+    return engine
+
+
+def _run(engine, source, batch_size=2):
+    checkpoint = user_import.Checkpoint(f"{source}.checkpoint", source)
+    importer = user_import.UserImporter(
+        engine, METHOD, checkpoint.load(), batch_size=batch_size
+    )
+    return importer.run(user_import.read_records(source))
+
+
+class TestUserImport:
+    """Bulk User Import Test"""
+
+    def test_read_ndjson(self, tmp_path):
+        path = tmp_path / "users.ndjson"
+        path.write_text('{"login": "a"}\n\n{"login": "b"}\n')
+
+        assert [r["login"] for r in user_import.read_records(str(path))] == [
+            "a",
+            "b",
+        ]
+
+    def test_is_password_hash(self):
+        assert user_import.is_password_hash(
+            generate_password_hash("p", METHOD)
+        )
+        assert not user_import.is_password_hash("pbkdf2:password")
+
+    def test_run(self, engine, source):
+        checkpoint = _run(engine, source)
+
+        assert checkpoint.offset == 8
+        assert checkpoint.imported == 3
+        assert checkpoint.skipped == 5
+
+        cursor = engine.raw_connection().cursor().__enter__()
+        rows = {r[2]: r for batch in cursor.copied for r in batch}
+        assert sorted(rows) == ["a", "b", "d"]
+        assert rows["b"][4] == "admin"
+        assert check_password_hash(rows["a"][5], "pa")
+        assert check_password_hash(rows["b"][5], "pb")
+
+        with open(f"{source}.checkpoint") as f:
+            assert json.load(f)["offset"] == 8
+
+    def test_resume(self, engine, source):
+        checkpoint = user_import.Checkpoint(f"{source}.checkpoint", source)
+        checkpoint.offset, checkpoint.imported = 3, 2
+        checkpoint.save()
+
+        checkpoint = _run(engine, source)
+
+        cursor = engine.raw_connection().cursor().__enter__()
+        assert [r[2] for batch in cursor.copied for r in batch] == ["d"]
+        assert checkpoint.offset == 8
+        assert checkpoint.imported == 3
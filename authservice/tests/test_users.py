@@ -5,6 +5,7 @@ import pytest
 import sqlalchemy as sa
 
 from authservice.database import models, db
+from authservice.tokens.tokens import TokenManager
 from . import random_refs as r
 from .utils import get_random_one
 
@@ -61,6 +62,22 @@ class TestUsersApi:
 
         assert rv.status_code == 200
 
+    def test_get_cursor(self, client, headers):
+        """Test Case Api"""
+
+        rv = client.get("api/v1/user/users?limit=1&offset=1", headers=headers)
+        expected = rv.json["items"]
+
+        rv = client.get("api/v1/user/users?limit=1", headers=headers)
+        cursor = rv.json["next_cursor"]
+        assert cursor
+
+        rv = client.get(
+            f"api/v1/user/users?limit=1&cursor={cursor}", headers=headers
+        )
+        assert rv.status_code == 200
+        assert rv.json["items"] == expected
+
     def test_get_one(self, client, headers):
         """Test Case Api"""
 
@@ -158,6 +175,18 @@ class TestRefreshTokenEditApi:
         )
         assert rv.status_code == 200
 
+    def test_post_twice(self, client, token_pair):
+        """Test Case Api"""
+
+        _, refresh_token = token_pair
+        body = dict(refresh_token=str(refresh_token))
+
+        rv = client.post("api/v1/user/refresh-token", json=body)
+        assert rv.status_code == 200
+
+        rv = client.post("api/v1/user/refresh-token", json=body)
+        assert rv.status_code == 401
+
 
 @pytest.mark.use_user("user")
 class TestSessionsApi:
@@ -177,3 +206,134 @@ class TestSessionsApi:
         )
         assert rv.status_code == 200
 
+
+@pytest.mark.use_user("admin")
+class TestIntrospectApi:
+    """Introspect Api Test"""
+
+    def test_post(self, client, token_pair, headers):
+        """Test Case Api"""
+
+        access_token, refresh_token = token_pair
+        body = dict(
+            access_tokens=[access_token, "bad.token.00"],
+            refresh_tokens=[str(refresh_token)],
+        )
+
+        rv = client.post("api/v1/user/introspect", json=body, headers=headers)
+
+        assert rv.status_code == 200
+        assert [i["valid"] for i in rv.json["access_tokens"]] == [True, False]
+        assert rv.json["access_tokens"][0]["payload"]["login"] == "admin"
+        assert rv.json["refresh_tokens"][0]["valid"]
+        assert not rv.json["refresh_tokens"][0]["revoked"]
+
+    def test_post_unauthorized(self, client, token_pair):
+        """Test Case Api"""
+
+        access_token, refresh_token = token_pair
+        body = dict(
+            access_tokens=[access_token],
+            refresh_tokens=[str(refresh_token)],
+        )
+
+        rv = client.post("api/v1/user/introspect", json=body)
+
+        assert rv.status_code == 401
+
+
+@pytest.mark.use_user("user")
+class TestLogoutApi:
+    """Logout Api Test"""
+
+    def test_post(self, client, token_pair, headers):
+        """Test Case Api"""
+
+        access_token, refresh_token = token_pair
+        body = dict(
+            access_token=access_token,
+            refresh_token=str(refresh_token),
+        )
+
+        rv = client.post("api/v1/user/logout", json=body, headers=headers)
+        assert rv.status_code == 200
+
+        # access токен отозванной сессии больше не принимается
+        rv = client.get("api/v1/user/sessions", headers=headers)
+        assert rv.status_code == 401
+
+
+@pytest.mark.use_user("admin")
+class TestSessionsRevokeApi:
+    """Sessions Revoke Api Test"""
+
+    def test_post(self, client, headers):
+        """Test Case Api"""
+
+        user = db.session.execute(
+            sa.select(models.User).where(
+                models.User.login == "user",
+            )
+        ).scalar()
+        TokenManager().get_token_pair(user.id)
+
+        rv = client.post(
+            "api/v1/user/sessions/revoke",
+            json=dict(user_id=str(user.id)),
+            headers=headers,
+        )
+
+        assert rv.status_code == 200
+        assert rv.json["count"] >= 1
+
+        active = db.session.execute(
+            sa.select(sa.func.count(models.Session.id)).where(
+                models.Session.user_id == user.id,
+                models.Session.expired_at > datetime.datetime.now(),
+            )
+        ).scalar()
+        assert active == 0
+
+    def test_post_without_filters(self, client, headers):
+        """Test Case Api"""
+
+        rv = client.post(
+            "api/v1/user/sessions/revoke", json={}, headers=headers
+        )
+
+        assert rv.status_code == 400
+
+
+@pytest.mark.use_user("admin")
+class TestHistoryApi:
+    """Login History Api Test"""
+
+    def test_get(self, client, headers):
+        """Test Case Api"""
+
+        body = {"login": "admin", "password": "admin"}
+        for _ in range(2):
+            client.post("api/v1/user/login", json=body)
+
+        rv = client.get("api/v1/user/login_history?limit=1", headers=headers)
+        assert rv.status_code == 200
+        assert len(rv.json["items"]) == 1
+        first = rv.json["items"][0]["logged_in_at"]
+        cursor = rv.json["next_cursor"]
+
+        rv = client.get(
+            f"api/v1/user/login_history?limit=1&cursor={cursor}",
+            headers=headers,
+        )
+        assert rv.status_code == 200
+        assert rv.json["items"][0]["logged_in_at"] < first
+
+    def test_export(self, client, headers):
+        """Test Case Api"""
+
+        rv = client.get("api/v1/user/login_history/export", headers=headers)
+
+        assert rv.status_code == 200
+        assert rv.mimetype == "application/x-ndjson"
+        lines = rv.get_data(as_text=True).splitlines()
+        assert len(lines) >= 2